@@ -0,0 +1,302 @@
+# Search engine shared by the search algorithms (BFS, DFS, UCS, greedy and A*).
+# The algorithms only differ in the order the states of the frontier are taken,
+# given by the frontier created for each search:
+#   frontier(graph, vehicle, goal) -> object with push(state), pop() and len()
+# where the states are (node, operations, time) tuples and time is the time
+# the vehicle reaches the node (g(n)):
+# - FIFOFrontier:      first in, first out (BFS)
+# - LIFOFrontier:      last in, first out (DFS)
+# - priority_frontier: lowest priority first (UCS, greedy and A*), with a
+#                      priority function:
+#                        priority(graph, vehicle, node, goal, time) -> number
+
+# The priority frontier is a binary heap of (priority, insertion_order, state)
+# tuples, so the state with the lowest priority is taken in O(log n) and ties
+# are broken by insertion order (first inserted, first taken).
+# Nodes are marked as visited when they are added to the frontier, so each
+# node is added at most once and the frontier never holds stale entries.
+
+# The algorithms whose order doesn't depend on the goal (BFS, DFS and UCS) can
+# search the plans to several goals from a single search (see search_goals).
+
+from graph.graph import Graph
+from vehicle     import Vehicle, VehicleState
+from operation   import Operation, chain_operation, chain_to_list
+from .           import stats, shuttle
+
+from collections import deque
+from heapq       import heappush, heappop
+
+
+###
+# Frontiers
+###
+
+class FIFOFrontier:
+    def __init__(self, graph: Graph = None, vehicle: Vehicle = None, goal=None):
+        self.states = deque()
+
+    def __len__(self):
+        return len(self.states)
+
+    def push(self, state: tuple) -> None:
+        self.states.append(state)
+
+    def pop(self) -> tuple:
+        return self.states.popleft()
+
+
+class LIFOFrontier:
+    def __init__(self, graph: Graph = None, vehicle: Vehicle = None, goal=None):
+        self.states = []
+
+    def __len__(self):
+        return len(self.states)
+
+    def push(self, state: tuple) -> None:
+        self.states.append(state)
+
+    def pop(self) -> tuple:
+        return self.states.pop()
+
+
+class PriorityFrontier:
+    def __init__(self, priority, graph: Graph, vehicle: Vehicle, goal):
+        self.priority = priority
+        self.graph = graph
+        self.vehicle = vehicle
+        self.goal = goal
+        self.insertion_order = 0
+        self.states = []
+
+    def __len__(self):
+        return len(self.states)
+
+    def push(self, state: tuple) -> None:
+        node, _, time = state
+        self.insertion_order += 1
+        heappush(self.states, (self.priority(self.graph, self.vehicle, node, self.goal, time),
+                               self.insertion_order, state))
+
+    def pop(self) -> tuple:
+        return heappop(self.states)[2]
+
+
+# Returns the frontier factory of the priority function
+def priority_frontier(priority):
+    def frontier(graph: Graph, vehicle: Vehicle, goal) -> PriorityFrontier:
+        return PriorityFrontier(priority, graph, vehicle, goal)
+    return frontier
+
+
+###
+# Search
+###
+
+def search(frontier,
+           graph: Graph,
+           vehicle: Vehicle,
+           response_time: int,
+           start_name: str,
+           goal_name: str,
+           start_time: int = 0,
+           dependencies: set = None,
+           latest_times: list = None) -> list[Operation]:
+    results = search_goals(frontier, graph, vehicle, {goal_name: response_time},
+                           start_name, start_time, dependencies, latest_times)
+    return results.get(goal_name, None)
+
+
+# Searches the plans from the start node to several goals (catastrophe nodes)
+# at once, where goals is a dictionary of response times by goal name.
+# Returns a dictionary with the result of each goal (None if not reached).
+# NOTE the nodes reached after the response time of a goal are still explored
+# (up to the latest response time), so the plans can differ from the ones
+# found searching each goal on its own
+# The names of the nodes visited, on which the results depend (see SearchCache),
+# are added to the dependencies set if given
+# The latest time compared with a response time that was before it (relative
+# to the start time) is appended to the latest_times list if given: the results
+# are the same with any earlier response times after it (see SearchCache)
+def search_goals(frontier,
+                 graph: Graph,
+                 vehicle: Vehicle,
+                 goals: dict[str, int],
+                 start_name: str,
+                 start_time: int = 0,
+                 dependencies: set = None,
+                 latest_times: list = None) -> dict:
+
+    start = graph.get_node(start_name)
+    goals = {
+        goal_name: response_time
+        for goal_name, response_time in goals.items()
+        if graph.get_node(goal_name) is not None
+    }
+
+    if start is None or not goals:
+        return {}
+
+    # Nodes reached after all the response times are discarded
+    response_time = max(goals.values())
+
+    # Take a snapshot of the graph to avoid modifying the original one
+    graph = graph.snapshot()
+
+    # Iterate only the edges the vehicle can travel through
+    view = graph.get_view(vehicle)
+
+    # Copy the vehicle to avoid modifying the original one
+    vehicle = vehicle.copy()
+
+    # First operation: start
+    # NOTE the operations of the states are chains (see operation.py)
+    first_ops = None
+    if start_time == 0:
+        start_op = Operation(0, "start", vehicle=vehicle.name, node=start.name)
+        first_ops = chain_operation(first_ops, start_op)
+
+    # Load the supplies to maximize the resolution of each catastrophe,
+    # the load operation goes after the start operation of the plan to the goal
+    goal_vehicles = {}
+    load_ops = {}
+    for goal_name in goals.keys():
+        goal_vehicle = vehicle.copy()
+        goal_demand = graph.get_node(goal_name).catastrophe.supplies_demand
+        vehicle_cargo_contents = goal_vehicle.cargo_contents.copy()
+        supplies_loaded, _ = goal_vehicle.load_supplies_for_catastrophe(goal_demand)
+        if vehicle_cargo_contents != goal_vehicle.cargo_contents:
+            load_ops[goal_name] = Operation(0, "load", vehicle=vehicle.name,
+                                            node=start.name, supplies=supplies_loaded)
+        goal_vehicles[goal_name] = goal_vehicle
+
+    results = {goal_name: None for goal_name in goals.keys()}
+    goals_left = set(goals.keys())
+
+    # Goal given to the frontier
+    # NOTE only frontiers that don't use the goal can search several goals
+    goal = graph.get_node(next(iter(goals))) if len(goals) == 1 else None
+
+    # Fuel state of the vehicle while exploring the graph
+    # (the vehicle is only updated with it when the goal is reached)
+    state = VehicleState.from_vehicle(vehicle)
+
+    # Initialize the frontier with tuples (node, operations, time)
+    frontier = frontier(graph, vehicle, goal)
+    frontier.push((start, first_ops, start_time))
+
+    # Keep track of visited nodes
+    visited = set()
+    visited.add(start.name)
+
+    # Latest time before the response times
+    # NOTE the times of the nodes taken from the frontier were already compared
+    latest_time = start_time
+
+    while frontier:
+        # Take the next node of the frontier
+        node, operations, current_time = frontier.pop()
+        stats.expansions += 1
+
+        # Solution found, the other goals are still searched
+        if node.name in goals_left:
+            goals_left.remove(node.name)
+
+            # Goals reached after their response time have no plan
+            # (except the start node, as when searching a single goal)
+            if node == start or current_time < goals[node.name]:
+                # Update the vehicle with the search state
+                goal_vehicle = goal_vehicles[node.name]
+                goal_vehicle.tank = state.tank
+
+                # Build the list of operations of the path
+                goal_operations = chain_to_list(operations)
+                if node.name in load_ops:
+                    goal_operations.insert(int(start_time == 0), load_ops[node.name])
+
+                # Drop the supplies and shuttle supplies until the catastrophe is resolved
+                goal_operations, fuel_consumption, goal_latest_time = shuttle.resolve(
+                    graph, view, goal_vehicle, node, goal_operations, current_time, goals[node.name]
+                )
+                results[node.name] = (goal_operations, fuel_consumption)
+                latest_time = max(latest_time, goal_latest_time)
+
+            if not goals_left:
+                if dependencies is not None:
+                    dependencies.update(visited)
+                if latest_times is not None:
+                    latest_times.append(latest_time - start_time)
+                return results
+
+        # Explore neighbors
+        for edge in view.edges(graph.node_ids[node.name]):
+            prox = graph.id_nodes[view.targets[edge]]
+            e_distance = view.distances[edge]
+
+            # Vehicle state for this edge
+            # (the states and the operations are shared, not copied)
+            tmp_state = state
+            tmp_operations = operations
+            tmp_current_time = current_time
+
+            # If the response time for the catastrophe has passed, stop processing
+            if tmp_current_time >= response_time:
+                continue
+
+            # Check if the node has already been visited
+            # NOTE the check is made here do to the multiple edges between nodes
+            # this way unnecessary visits are avoided
+            if prox.name in visited:
+                continue
+
+            visited.add(prox.name)
+
+            # Ensure the vehicle has enough fuel
+            if not tmp_state.has_enough_fuel(e_distance):
+                # Refuel if necessary
+                fuel_needed = tmp_state.calculate_fuel_needed(e_distance)
+
+                # refuel the ammount needed in order to reach the node
+                # NOTE ignores fuel left in node as it is not considered in this model
+                tmp_state, refuel_time = tmp_state.refuel(fuel_needed)
+                tmp_current_time += refuel_time
+
+                refuel_op = Operation(tmp_current_time, "refuel",
+                                      duration=refuel_time, vehicle=vehicle.name,
+                                      node=node.name, fuel=fuel_needed)
+                tmp_operations = chain_operation(tmp_operations, refuel_op)
+
+                # Check response time after refueling
+                if tmp_current_time >= response_time:
+                    continue
+                if tmp_current_time > latest_time:
+                    latest_time = tmp_current_time
+
+            # Travel to the next node
+            tmp_state, travel_time, fuel_used = tmp_state.travel(e_distance)
+            start_time_travel = tmp_current_time
+            tmp_current_time += travel_time
+
+            # Check response time after traveling
+            if tmp_current_time >= response_time:
+                continue
+            if tmp_current_time > latest_time:
+                latest_time = tmp_current_time
+
+            # Restore the state when adding the neighbor to the frontier
+            state = tmp_state
+            operations = tmp_operations
+            current_time = tmp_current_time
+
+            # Add the neighbor to the frontier
+            travel_op = Operation(start_time_travel, "move",
+                                  duration=travel_time, vehicle=vehicle.name,
+                                  node=prox.name, fuel_consumed=fuel_used)
+            frontier.push((prox, chain_operation(tmp_operations, travel_op), tmp_current_time))
+
+    # Goals not reached
+    if dependencies is not None:
+        dependencies.update(visited)
+    if latest_times is not None:
+        latest_times.append(latest_time - start_time)
+    return results
@@ -0,0 +1,173 @@
+# Plan of a vehicle once a search reaches the catastrophe at the goal node.
+# The vehicle drops the supplies it carries and, while the catastrophe isn't
+# resolved, shuttles between the catastrophe and the nearest node:
+# 1. Go to the nearest node
+# 2. Fuel if needed
+# 3. Load the supplies min(demand, cargo_capacity)
+# 4. Go to the catastrophe
+# 5. Drop the supplies
+# 6. Repeat until the catastrophe is resolved or the time is over
+
+# The round trips only depend on the vehicle specs, the remaining demand and
+# the response time, so they are computed with plain numbers in one pass
+# instead of simulating each trip on copies of the vehicle and operations:
+# - both legs of a trip take the same time and fuel, computed once
+# - each trip loads the remaining demand up to the cargo capacity
+#   (perishable supplies first) and drops all of it
+# - a trip is only made if it ends before the response time
+
+# The plan also returns the latest time that was before the response time when
+# compared with it: the same plan is found with any response time after it
+# (see SearchCache).
+
+from graph.graph import Graph
+from vehicle     import Vehicle, VehicleState
+from operation   import Operation
+from supply      import perishable_kinds
+
+from math        import ceil
+
+
+# Returns the operations, the fuel consumption and the latest time before the
+# response time (see above) of the vehicle that reached
+# the goal node, with the given operations, at the given time
+def resolve(graph: Graph,
+            view,
+            vehicle: Vehicle,
+            node,
+            operations: list[Operation],
+            current_time: int,
+            response_time: int) -> (list[Operation], float, int):
+
+    # The catastrophe of the goal node is modified by the drops
+    node = graph.mutable_node(node)
+
+    # Append the "drop supplies" operation
+    # NOTE the vehicle only carries supplies for the catastrophe demand,
+    # so it is empty after the drop
+    cargo_supplied, _ = node.catastrophe.supply(vehicle.cargo_contents)
+    drop_op = Operation(current_time, "drop", vehicle=vehicle.name,
+                        node=node.name, supplies=cargo_supplied)
+    operations.append(drop_op)
+
+    # Find the nearest node to the catastrophe
+    # If there are no neighbors the vehicle can't help the catastrophe any further
+    latest_time = current_time
+    neighbors = view.edges(graph.node_ids[node.name])
+    if neighbors:
+        edge = min(neighbors, key=lambda e: view.distances[e])
+        nearest_node = graph.id_nodes[view.targets[edge]]
+
+        trip_operations, latest_time = get_round_trips(vehicle, node, nearest_node,
+                                                       view.distances[edge],
+                                                       current_time, response_time)
+        operations += trip_operations
+
+    # Update the fuel consumption
+    fuel_consumption = ceil(sum([op.fuel_consumed or 0 for op in operations]) * 100) / 100
+    # Update the time from the operations
+    operation_time = 0
+    for op in operations:
+        op.time = operation_time
+        operation_time += op.duration
+    return operations, fuel_consumption, latest_time
+
+
+# Returns the operations of the round trips between the catastrophe node and
+# the nearest node, starting at the given time, and the latest time before the
+# response time
+def get_round_trips(vehicle: Vehicle,
+                    node,
+                    nearest_node,
+                    distance: int,
+                    current_time: int,
+                    response_time: int) -> (list[Operation], int):
+
+    catastrophe = node.catastrophe
+    demand = catastrophe.supplies_demand
+    state = VehicleState.from_vehicle(vehicle)
+
+    # Both legs of the trips take the same time and fuel
+    _, travel_time, fuel_used = state.travel(distance)
+
+    # Perishable supplies are loaded first
+    load_order = sorted(demand.keys(), key=lambda kind: not perishable_kinds.get(kind, False))
+
+    # NOTE the times compared only grow, so the latest one before the
+    # response time is the last one
+    operations = []
+    latest_time = current_time
+    while not catastrophe.is_resolved():
+
+        if catastrophe.has_time_expired(current_time):
+            break
+        latest_time = current_time
+
+        trip_operations = []
+
+        # Travel to the nearest node
+        trip_state, _, _ = state.travel(distance)
+        trip_time = current_time + travel_time
+
+        if trip_time >= response_time:
+            break
+        latest_time = trip_time
+
+        trip_operations.append(Operation(current_time, "move",
+                                         duration=travel_time, vehicle=vehicle.name,
+                                         node=nearest_node.name, fuel_consumed=fuel_used))
+
+        # Refuel if necessary
+        if not trip_state.has_enough_fuel(distance):
+            fuel_needed = trip_state.calculate_fuel_needed(distance)
+            trip_state, refuel_time = trip_state.refuel(fuel_needed)
+            trip_time += refuel_time
+
+            trip_operations.append(Operation(trip_time, "refuel",
+                                             duration=refuel_time, vehicle=vehicle.name,
+                                             node=nearest_node.name, fuel=fuel_needed))
+
+            if trip_time >= response_time:
+                break
+            latest_time = trip_time
+
+        # Load the supplies, up to the cargo capacity
+        supplies_loaded = {}
+        cargo = 0
+        for kind in load_order:
+            if kind not in demand:
+                continue
+            amount = min(demand[kind], vehicle.cargo_capacity - cargo)
+            if amount > 0:
+                supplies_loaded[kind] = amount
+                cargo += amount
+
+        trip_operations.append(Operation(trip_time, "load", vehicle=vehicle.name,
+                                         node=nearest_node.name, supplies=supplies_loaded))
+
+        # Travel to the catastrophe
+        trip_state, _, _ = trip_state.travel(distance)
+        start_time_travel = trip_time
+        trip_time += travel_time
+
+        if trip_time >= response_time:
+            break
+        latest_time = trip_time
+
+        trip_operations.append(Operation(start_time_travel, "move",
+                                         duration=travel_time, vehicle=vehicle.name,
+                                         node=node.name, fuel_consumed=fuel_used))
+
+        # Drop all the supplies loaded
+        cargo_supplied = {kind: supplies_loaded[kind] for kind in demand if kind in supplies_loaded}
+        catastrophe.supply_amount(cargo_supplied)
+
+        trip_operations.append(Operation(trip_time, "drop", vehicle=vehicle.name,
+                                         node=node.name, supplies=cargo_supplied))
+
+        # Update the state
+        operations += trip_operations
+        state = trip_state
+        current_time = trip_time
+
+    return operations, latest_time
@@ -0,0 +1,12 @@
+# Counters of the work done by the search algorithms, read by the benchmarks.
+# - expansions: number of nodes taken from the frontier to be expanded
+
+expansions = 0
+
+
+# Resets the counters and returns their previous values
+def reset() -> dict:
+    global expansions
+    counters = {"expansions": expansions}
+    expansions = 0
+    return counters
@@ -0,0 +1,153 @@
+# Assignment of the vehicles to the catastrophes, at most one vehicle for each
+# catastrophe and one catastrophe for each vehicle, minimizing the total cost
+# of the plans found by the search algorithms.
+
+# The candidates are (catastrophe, vehicle, cost) tuples, one for each plan.
+# The assignment serves as many catastrophes as possible and, among those
+# assignments, has the lowest total cost (a min-cost maximum matching).
+# Each catastrophe can also be left unserved at a penalty higher than the cost
+# of any assignment, so every catastrophe is matched (to a vehicle or to its
+# "unserved" option) and the problem is a plain min-cost assignment.
+
+# The assignment is solved with successive shortest augmenting paths
+# (Hungarian / Jonker-Volgenant) on the sparse candidates:
+# - each catastrophe is added in turn, through the shortest path (in reduced
+#   costs) to a free vehicle, which may reassign the vehicles on the path
+# - the reduced costs are kept non-negative with dual values, so the paths are
+#   found with Dijkstra's algorithm, stopped at the first free vehicle reached
+# - only the dual values of the nodes settled by each search are updated
+# so each catastrophe only explores the candidates around its path, instead
+# of the whole catastrophes x vehicles matrix.
+
+# Objectives (cost of a plan):
+# - fuel:     fuel consumption of the plan
+# - time:     arrival time at the catastrophe (time of the first drop)
+# - weighted: fuel_weight * fuel + time_weight * arrival time
+
+from operation import Operation
+
+from heapq import heappush, heappop
+
+OBJECTIVES = ["fuel", "time", "weighted"]
+
+
+# Returns the time the plan reaches the catastrophe (first drop operation)
+def get_arrival_time(operations: list[Operation]) -> int:
+    for operation in operations:
+        if operation.operation_type == "drop":
+            return operation.time
+    return operations[-1].time if operations else 0
+
+
+# Returns the function computing the cost of a plan, given its operations
+# and fuel consumption, for the objective
+def get_cost_function(objective: str, fuel_weight: float = 1.0, time_weight: float = 1.0):
+    match objective:
+        case "fuel":
+            return lambda operations, fuel_consumption: fuel_consumption
+        case "time":
+            return lambda operations, fuel_consumption: get_arrival_time(operations)
+        case "weighted":
+            return lambda operations, fuel_consumption: (
+                fuel_weight * fuel_consumption + time_weight * get_arrival_time(operations)
+            )
+        case _:
+            raise ValueError(f"Invalid objective: {objective}. Must be one of {OBJECTIVES}.")
+
+
+# Returns the minimum cost assignment of the candidates, (row, column, cost)
+# tuples with the rows in range(num_rows) and the columns in range(num_columns),
+# as a dictionary of the column assigned to each row (rows left out are unassigned).
+# The number of rows assigned is the maximum possible.
+def assign(candidates: list[tuple], num_rows: int, num_columns: int) -> dict:
+    if num_rows == 0 or not candidates:
+        return {}
+
+    # Costs must be non-negative, so the reduced costs are too
+    min_cost = min(cost for _, _, cost in candidates)
+    offset = -min_cost if min_cost < 0 else 0
+
+    # Leaving a row unassigned costs more than any assignment of all the rows
+    max_cost = max(cost for _, _, cost in candidates) + offset
+    penalty = (max_cost + 1) * (num_rows + 1)
+
+    # Edges of each row, (column, cost), with the "unassigned" column of the
+    # row, num_columns + row, as the last one
+    row_edges = [[] for _ in range(num_rows)]
+    for row, column, cost in candidates:
+        row_edges[row].append((column, cost + offset))
+    for row in range(num_rows):
+        row_edges[row].append((num_columns + row, penalty))
+
+    # Dual values of the rows and columns, the reduced cost of an edge,
+    # cost - row_duals[row] - column_duals[column], is never negative
+    # and is zero for the assigned edges
+    # NOTE starting the rows at their cheapest edge makes the cheapest edges
+    # free to take, so most rows are assigned without exploring other rows
+    num_nodes = num_columns + num_rows
+    row_duals = [min(cost for _, cost in edges) for edges in row_edges]
+    column_duals = [0] * num_nodes
+    column_rows = [-1] * num_nodes
+    row_columns = [-1] * num_rows
+
+    for source in range(num_rows):
+        # Dijkstra from the row to the nearest free column, in reduced costs
+        distances = {}
+        previous_rows = {}
+        settled = set()
+        settled_order = []
+        heap = []
+
+        row, row_distance = source, 0
+        while True:
+            # Relax the edges of the row
+            row_dual = row_duals[row]
+            for column, cost in row_edges[row]:
+                if column in settled:
+                    continue
+                distance = row_distance + cost - row_dual - column_duals[column]
+                if column not in distances or distance < distances[column]:
+                    distances[column] = distance
+                    previous_rows[column] = row
+                    heappush(heap, (distance, column))
+
+            # Settle the nearest column, skipping stale entries
+            # NOTE there is always a free column, the "unassigned" column of the source
+            distance, column = heappop(heap)
+            while column in settled or distances[column] != distance:
+                distance, column = heappop(heap)
+            settled.add(column)
+            settled_order.append(column)
+
+            if column_rows[column] == -1:
+                break
+
+            # Continue from the row assigned to the column (zero reduced cost)
+            row, row_distance = column_rows[column], distance
+
+        free_column, free_distance = column, distance
+
+        # Update the duals of the nodes reached
+        row_duals[source] += free_distance
+        for column in settled_order:
+            shift = free_distance - distances[column]
+            column_duals[column] -= shift
+            if column_rows[column] != -1:
+                row_duals[column_rows[column]] += shift
+
+        # Augment along the path, reassigning the columns of the path
+        column = free_column
+        while True:
+            row = previous_rows[column]
+            previous_column = row_columns[row]
+            column_rows[column] = row
+            row_columns[row] = column
+            if row == source:
+                break
+            column = previous_column
+
+    return {
+        row: column
+        for row, column in enumerate(row_columns)
+        if column < num_columns
+    }
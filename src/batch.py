@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+# Headless batch runner of the planner.
+# Runs the planner (see MissionPlanner.planner) for each scenario, heuristic and
+# algorithm given, in parallel worker processes, without asking for any input.
+# For each run it writes to the output directory:
+# - <run>.log:  output of the planner (plans elected and execution log)
+# - <run>.json: operations executed by each vehicle
+# where <run> is <scenario>_h<heuristic>_<algorithm>, and the metrics of all
+# the runs to the metrics file (JSON, or CSV if it ends with .csv):
+# - seconds:       wall time of the planner (without loading the scenario)
+# - expansions:    number of nodes expanded by the searches
+# - resolved:      number of catastrophes resolved (out of catastrophes)
+# - operations:    number of operations executed
+# - fuel_consumed: fuel consumed by the vehicles
+# - end_time:      time of the last operation executed
+# - cache_hits:    number of searches reused from previous plannings (see SearchCache)
+# - error:         error of the run (None if it succeeded)
+# The runs that fail don't stop the batch, but the exit status is 1.
+
+# Scenarios are the built-in simulations (1-3) or scenario files.
+
+# Example:
+#   ./batch.py -s 1 2 scenarios/*.csv -a ucs astar -H 1 2 -j 4 -o runs
+
+from benchmark  import ALGORITHMS, HEURISTICS, write_results
+from assignment import OBJECTIVES
+from algorithms import stats
+import simulation_data
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import platform
+import datetime
+import time
+import json
+import sys
+import io
+import os
+
+
+###
+# Run functions
+###
+
+# Returns the name of a scenario given in the command line
+def get_scenario_name(scenario: str) -> str:
+    if scenario.isdigit():
+        return f"simulation_{scenario}"
+    return os.path.splitext(os.path.basename(scenario))[0]
+
+
+# Runs the planner of a task, (scenario, heuristic, algorithm, options, output_dir),
+# writing its output files. Returns the metrics of the run
+def run_task(task: tuple) -> dict:
+    scenario, heuristic, algorithm, options, output_dir = task
+    run_name = f"{get_scenario_name(scenario)}_h{heuristic}_{algorithm}"
+    metrics = {
+        "run": run_name,
+        "scenario": scenario,
+        "heuristic": heuristic,
+        "algorithm": algorithm,
+        "seconds": None,
+        "expansions": None,
+        "catastrophes": None,
+        "resolved": None,
+        "operations": None,
+        "fuel_consumed": None,
+        "end_time": None,
+        "cache_hits": None,
+        "error": None,
+    }
+
+    output = io.StringIO()
+    try:
+        simulation_option = int(scenario) if scenario.isdigit() else scenario
+        mission_planner = simulation_data.init_simulation(simulation_option, heuristic)
+
+        stats.reset()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            operations_executed = mission_planner.planner(
+                simulation_option, heuristic, algorithm, options["verbose"],
+                options["multi_goal"], options["workers"], options["objective"],
+                options["routing"], options["time_budget"], options["max_iterations"],
+                interactive=False
+            )
+        metrics["seconds"] = time.perf_counter() - start
+        metrics["expansions"] = stats.reset()["expansions"]
+
+    except Exception as e:
+        metrics["error"] = f"{type(e).__name__}: {e}"
+        operations_executed = []
+
+    else:
+        catastrophes = mission_planner.catastrophes.values()
+        metrics["catastrophes"] = len(catastrophes)
+        metrics["resolved"] = sum(c.is_resolved() for c in catastrophes)
+        metrics["operations"] = len(operations_executed)
+        metrics["fuel_consumed"] = round(
+            sum(op.fuel_consumed or 0 for op in operations_executed), 2
+        )
+        metrics["end_time"] = max((op.time for op in operations_executed), default=None)
+        metrics["cache_hits"] = mission_planner.search_cache.hits
+
+    with open(os.path.join(output_dir, f"{run_name}.log"), "w") as file:
+        file.write(output.getvalue())
+
+    operations_by_vehicle = {}
+    for operation in operations_executed:
+        if operation.vehicle not in operations_by_vehicle:
+            operations_by_vehicle[operation.vehicle] = []
+        operations_by_vehicle[operation.vehicle].append(str(operation))
+
+    with open(os.path.join(output_dir, f"{run_name}.json"), "w") as file:
+        json.dump({**metrics, "operations_by_vehicle": operations_by_vehicle}, file, indent=2)
+
+    return metrics
+
+
+# Runs the tasks in parallel processes (in this process with a single job).
+# Returns the metrics of each task, in the same order
+def run_tasks(tasks: list, jobs: int = 1) -> list:
+    if jobs is None or jobs <= 1 or len(tasks) <= 1:
+        return [run_task(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_task, tasks))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Headless batch runner of the planner")
+    arg_parser.add_argument("-s", "--scenarios", nargs="+", required=True,
+                            help="Built-in simulations (1-3) or scenario files")
+    arg_parser.add_argument("-a", "--algorithms", nargs="+", default=ALGORITHMS,
+                            choices=ALGORITHMS, help="Search algorithms")
+    arg_parser.add_argument("-H", "--heuristics", nargs="+", type=int, default=[1],
+                            choices=HEURISTICS, help="Heuristics")
+    arg_parser.add_argument("--objective", default="fuel", choices=OBJECTIVES,
+                            help="Objective of the assignment of the vehicles to the catastrophes")
+    arg_parser.add_argument("--multi-goal", action="store_true",
+                            help="Search the plans of each vehicle to every catastrophe at once")
+    arg_parser.add_argument("--routing", action="store_true",
+                            help="Plan tours of several catastrophes for each vehicle")
+    arg_parser.add_argument("--time-budget", type=float,
+                            help="Seconds to improve the tours of the vehicles (with --routing, "
+                                 "default: 1 second, no limit with --max-iterations)")
+    arg_parser.add_argument("--max-iterations", type=int,
+                            help="Maximum improvements of the tours of the vehicles (with --routing), "
+                                 "the tours don't depend on the speed of the machine without a time budget")
+    arg_parser.add_argument("-w", "--workers", type=int,
+                            help="Processes searching the plans of each run in parallel")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                            help="Runs in parallel (default: number of CPUs)")
+    arg_parser.add_argument("-v", "--verbose", action="store_true",
+                            help="Write the plans of every vehicle to the logs")
+    arg_parser.add_argument("-o", "--output-dir", default="runs",
+                            help="Directory of the logs, plans and metrics")
+    arg_parser.add_argument("-m", "--metrics", default="metrics.json",
+                            help="Metrics file in the output directory (.json or .csv)")
+    args = arg_parser.parse_args()
+
+    # Without a time budget the tours are improved up to the maximum iterations
+    if args.time_budget is None and args.max_iterations is None:
+        args.time_budget = 1.0
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "verbose": args.verbose,
+        "multi_goal": args.multi_goal,
+        "workers": args.workers,
+        "objective": args.objective,
+        "routing": args.routing,
+        "time_budget": args.time_budget,
+        "max_iterations": args.max_iterations,
+    }
+    tasks = [
+        (scenario, heuristic, algorithm, options, args.output_dir)
+        for scenario in args.scenarios
+        for heuristic in args.heuristics
+        for algorithm in args.algorithms
+    ]
+
+    print(f"Running {len(tasks)} runs with {args.jobs} jobs...", file=sys.stderr)
+    results = run_tasks(tasks, args.jobs)
+
+    metadata = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **options,
+    }
+    write_results(os.path.join(args.output_dir, args.metrics), metadata, results)
+
+    failed = [row for row in results if row["error"] is not None]
+    for row in failed:
+        print(f"{row['run']}: {row['error']}", file=sys.stderr)
+    print(f"{len(results) - len(failed)} runs succeeded, {len(failed)} failed", file=sys.stderr)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+# Benchmark runner of the search algorithms and heuristics.
+# For each scenario, heuristic and algorithm it measures the phases:
+# - load: loading the scenario (once per scenario and heuristic)
+# - heuristic: building the heuristic values on a fresh distance oracle
+#   (once per scenario and heuristic)
+# - build_catastrophe_vehicles: searching the plans of every vehicle to every catastrophe
+# - assign_optimal_objectives: assigning the vehicles to the catastrophes
+# - planner: the whole planner loop (including the destructions and replanning)
+# recording the wall time (best of the repetitions), the number of nodes
+# expanded by the searches and the peak memory allocated (with tracemalloc).
+
+# Scenarios are the built-in simulations (1-3), scenario files or synthetic
+# scenarios of the given sizes (see generator.py), written to a temporary file.
+# The results are written as JSON (or CSV if the output file ends with .csv),
+# and can be compared with the results of a previous run to spot regressions.
+
+# Example:
+#   ./benchmark.py -s 1 2 --sizes 1000 10000 -a ucs astar -H 1 2 -o results.json
+#   ./benchmark.py --sizes 1000 -o new.json --compare results.json
+
+from scenario   import init_heuristic
+from generator  import write_scenario
+from assignment import OBJECTIVES
+from algorithms import stats
+import simulation_data
+
+from contextlib import redirect_stdout
+import argparse
+import platform
+import tempfile
+import datetime
+import tracemalloc
+import time
+import json
+import csv
+import sys
+import io
+import os
+
+ALGORITHMS = ["bfs", "dfs", "ucs", "greedy", "astar"]
+HEURISTICS = [1, 2, 3]
+
+# Relative slowdown reported as a regression when comparing results
+REGRESSION_THRESHOLD = 0.10
+
+
+###
+# Measure functions
+###
+
+# Runs the function (repeat times, with a fresh setup each time) and returns
+# the result of the last run along with the best wall time in seconds,
+# the number of nodes expanded and the peak memory allocated in bytes (or None)
+def measure(fn, setup=None, repeat: int = 1, memory: bool = True):
+    best_time = None
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+
+        stats.reset()
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        expansions = stats.reset()["expansions"]
+
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    peak_memory = None
+    if memory:
+        # Separate run, as tracing the allocations slows down the run
+        args = setup() if setup is not None else ()
+        tracemalloc.start()
+        fn(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats.reset()
+
+    return result, best_time, expansions, peak_memory
+
+
+# Runs the planner without printing the plans nor asking for input
+def run_planner(mission_planner, scenario: str, heuristic: int, algorithm: str,
+                multi_goal: bool = False, workers: int = None, objective: str = "fuel",
+                routing: bool = False, time_budget: float = 1.0,
+                max_iterations: int = None) -> None:
+    with redirect_stdout(io.StringIO()):
+        mission_planner.planner(scenario, heuristic, algorithm, False, multi_goal, workers,
+                                objective, routing, time_budget, max_iterations,
+                                interactive=False)
+
+
+# Runs every phase of a scenario and returns the list of result rows
+def benchmark_scenario(name: str, scenario, algorithms: list, heuristics: list,
+                       repeat: int, memory: bool, multi_goal: bool = False,
+                       workers: int = None, objective: str = "fuel", routing: bool = False,
+                       time_budget: float = 1.0, max_iterations: int = None) -> list:
+    results = []
+
+    for heuristic in heuristics:
+        def load():
+            return simulation_data.init_simulation(scenario, heuristic)
+
+        mission_planner, load_time, _, load_memory = measure(load, repeat=repeat, memory=memory)
+        graph = mission_planner.graph
+        row = {
+            "scenario": name,
+            "nodes": len(graph.nodes),
+            "edges": graph.get_num_edges(),
+            "heuristic": heuristic,
+        }
+        results.append({**row, "algorithm": None, "phase": "load", "seconds": load_time,
+                        "expansions": 0, "peak_memory": load_memory})
+
+        # Heuristic construction without any cached distance
+        def heuristic_setup():
+            planner = load()
+            planner.graph.use_distance_oracle()
+            return planner.graph, planner.catastrophes, planner.fleet, heuristic
+
+        _, heuristic_time, _, heuristic_memory = measure(
+            init_heuristic, heuristic_setup, repeat=repeat, memory=memory
+        )
+        results.append({**row, "algorithm": None, "phase": "heuristic", "seconds": heuristic_time,
+                        "expansions": 0, "peak_memory": heuristic_memory})
+
+        for algorithm in algorithms:
+            def build_setup():
+                planner = load()
+                return planner, planner.get_search_algorithm(algorithm)
+
+            def build(planner, search_algorithm):
+                return planner, planner.build_catastrophe_vehicles(search_algorithm, 0,
+                                                                   multi_goal, workers)
+
+            (planner, catastrophe_vehicles), build_time, build_expansions, build_memory = \
+                measure(build, build_setup, repeat=repeat, memory=memory)
+
+            def assign_setup():
+                planner, catastrophe_vehicles = build(*build_setup())
+                return planner, catastrophe_vehicles
+
+            def assign(planner, catastrophe_vehicles):
+                return planner.assign_optimal_objectives(catastrophe_vehicles, planner.fleet,
+                                                         objective)
+
+            _, assign_time, _, assign_memory = \
+                measure(assign, assign_setup, repeat=repeat, memory=memory)
+
+            def planner_setup():
+                return (load(), scenario, heuristic, algorithm, multi_goal, workers, objective,
+                        routing, time_budget, max_iterations)
+
+            _, planner_time, planner_expansions, planner_memory = \
+                measure(run_planner, planner_setup, repeat=repeat, memory=memory)
+
+            for phase, seconds, expansions, peak_memory in (
+                ("build_catastrophe_vehicles", build_time, build_expansions, build_memory),
+                ("assign_optimal_objectives", assign_time, 0, assign_memory),
+                ("planner", planner_time, planner_expansions, planner_memory),
+            ):
+                results.append({**row, "algorithm": algorithm, "phase": phase, "seconds": seconds,
+                                "expansions": expansions, "peak_memory": peak_memory})
+
+    return results
+
+
+###
+# Output functions
+###
+
+def get_row_key(row: dict) -> tuple:
+    return (row["scenario"], row["heuristic"], row["algorithm"], row["phase"])
+
+
+def write_results(path: str, metadata: dict, results: list) -> None:
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        return
+
+    with open(path, "w") as file:
+        json.dump({"metadata": metadata, "results": results}, file, indent=2)
+
+
+def read_results(path: str) -> list:
+    if path.endswith(".csv"):
+        with open(path, newline="") as file:
+            return [
+                {**row, "heuristic": int(row["heuristic"]),
+                 "algorithm": row["algorithm"] or None, "seconds": float(row["seconds"])}
+                for row in csv.DictReader(file)
+            ]
+
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+# Prints the time of each phase compared with a previous run,
+# flagging the phases slower by more than the regression threshold
+def print_comparison(results: list, previous_results: list) -> None:
+    previous = {get_row_key(row): row for row in previous_results}
+
+    for row in results:
+        old = previous.get(get_row_key(row), None)
+        if old is None or not old["seconds"]:
+            continue
+
+        ratio = row["seconds"] / old["seconds"]
+        flag = "REGRESSION" if ratio > 1 + REGRESSION_THRESHOLD else ""
+        print(
+            f"{row['scenario']:>12} h{row['heuristic']} {str(row['algorithm']):>6} "
+            f"{row['phase']:<27} {old['seconds']:10.4f}s -> {row['seconds']:10.4f}s "
+            f"({ratio:5.2f}x) {flag}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark of the search algorithms and heuristics")
+    arg_parser.add_argument("-s", "--scenarios", nargs="*", default=[],
+                            help="Built-in simulations (1-3) or scenario files")
+    arg_parser.add_argument("--sizes", nargs="*", type=int, default=[],
+                            help="Number of nodes of the synthetic scenarios")
+    arg_parser.add_argument("--seed", type=int, default=0,
+                            help="Seed of the synthetic scenarios")
+    arg_parser.add_argument("-a", "--algorithms", nargs="+", default=ALGORITHMS,
+                            choices=ALGORITHMS, help="Search algorithms")
+    arg_parser.add_argument("-H", "--heuristics", nargs="+", type=int, default=HEURISTICS,
+                            choices=HEURISTICS, help="Heuristics")
+    arg_parser.add_argument("--multi-goal", action="store_true",
+                            help="Search the plans of each vehicle to every catastrophe at once")
+    arg_parser.add_argument("-w", "--workers", type=int,
+                            help="Processes searching the plans in parallel")
+    arg_parser.add_argument("--objective", default="fuel", choices=OBJECTIVES,
+                            help="Objective of the assignment of the vehicles to the catastrophes")
+    arg_parser.add_argument("--routing", action="store_true",
+                            help="Plan tours of several catastrophes for each vehicle")
+    arg_parser.add_argument("--time-budget", type=float,
+                            help="Seconds to improve the tours of the vehicles (with --routing, "
+                                 "default: 1 second, no limit with --max-iterations)")
+    arg_parser.add_argument("--max-iterations", type=int,
+                            help="Maximum improvements of the tours of the vehicles (with --routing), "
+                                 "the tours don't depend on the speed of the machine without a time budget")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=1,
+                            help="Repetitions of each measure (the best time is kept)")
+    arg_parser.add_argument("--no-memory", action="store_true",
+                            help="Don't measure the peak memory (skips the traced runs)")
+    arg_parser.add_argument("-o", "--output", default="benchmark.json",
+                            help="Results file (.json or .csv)")
+    arg_parser.add_argument("--compare",
+                            help="Results file of a previous run to compare with")
+    args = arg_parser.parse_args()
+
+    # Without a time budget the tours are improved up to the maximum iterations
+    if args.time_budget is None and args.max_iterations is None:
+        args.time_budget = 1.0
+
+    scenarios = []
+    for scenario in args.scenarios or ([] if args.sizes else ["1", "2", "3"]):
+        scenarios.append((scenario, int(scenario) if scenario.isdigit() else scenario))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"synthetic_{size}.csv")
+            write_scenario(path, num_nodes=size, seed=args.seed)
+            scenarios.append((f"synthetic_{size}", path))
+
+        results = []
+        for name, scenario in scenarios:
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            results += benchmark_scenario(name, scenario, args.algorithms, args.heuristics,
+                                          args.repeat, not args.no_memory, args.multi_goal,
+                                          args.workers, args.objective, args.routing,
+                                          args.time_budget, args.max_iterations)
+
+    metadata = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "multi_goal": args.multi_goal,
+        "workers": args.workers,
+        "objective": args.objective,
+        "routing": args.routing,
+        "time_budget": args.time_budget,
+        "max_iterations": args.max_iterations,
+    }
+    write_results(args.output, metadata, results)
+
+    if args.compare:
+        print_comparison(results, read_results(args.compare))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# Generator of synthetic scenarios of any size for scaling tests.
+# Scenarios are produced as scenario records (see scenario.py) from a fixed
+# seed, so the same parameters always give the same scenario, and can either
+# be built into a MissionPlanner object or streamed to a scenario file
+# without building the graph (e.g. for scenarios with millions of nodes).
+
+# The nodes ("N0", "N1", ...) are placed on a jittered square grid and the
+# edges connect nearby nodes, so the distances follow the node positions:
+# - each node can have an edge to the nodes at the EDGE_OFFSETS positions of
+#   the grid, each pair of nodes has at most one edge
+# - the edges are chosen with the probability needed to get num_edges edges
+#   on average, with the travel methods and access levels given by weights
+# - catastrophes, depots (nodes with vehicles) and destroyed nodes are
+#   distinct nodes chosen at random
+
+# Parameters:
+# - num_nodes: number of nodes
+# - num_edges: average number of edges (default 2 * num_nodes)
+# - directed: boolean indicating if the graph is directed
+# - travel_methods: dictionary of relative weights of the travel methods of the edges
+# - access_levels: dictionary of relative weights of the access levels of the edges
+# - cell_size: distance between neighbor nodes of the grid
+# - num_catastrophes: number of catastrophes
+# - deadlines: (min, max) time to respond to the catastrophes
+# - demands: (min, max) amount of each supply kind demanded by a catastrophe
+# - fleet_size: number of vehicles
+# - num_depots: number of nodes where the vehicles start
+# - categories: dictionary of relative weights of the vehicle categories
+#   (default: same weight for the categories of the travel methods in use)
+# - num_destructive_nodes: number of nodes destroyed during the simulation
+# - num_destructive_edges: number of edges destroyed during the simulation
+# - destruction_times: (min, max) time of the destruction of the nodes and edges
+# - seed: seed of the random number generator
+
+from scenario        import build_scenario
+from simulation_data import init_planner
+from vehicle         import VEHICLE_SPECS
+
+from array import array
+from math  import ceil, hypot
+import argparse
+import random
+import csv
+
+# Grid positions (row, column) of the possible neighbors of a node, relative to it
+EDGE_OFFSETS = [(0, 1), (1, 0), (1, 1), (1, -1), (0, 2), (2, 0), (1, 2), (2, 1)]
+
+SUPPLY_KINDS = ["food", "water", "medicine", "soskit"]
+
+DEFAULT_TRAVEL_METHODS = {"land": 0.7, "water": 0.1, "air": 0.2}
+DEFAULT_ACCESS_LEVELS  = {1: 0.5, 2: 0.35, 3: 0.15}
+
+
+# Returns the name of the node with the given index
+def node_name(index: int) -> str:
+    return f"N{index}"
+
+
+# Yields the scenario records, as [kind, fields...] lists, of a synthetic scenario
+def generate_records(num_nodes: int = 1000,
+                     num_edges: int = None,
+                     directed: bool = False,
+                     travel_methods: dict = DEFAULT_TRAVEL_METHODS,
+                     access_levels: dict = DEFAULT_ACCESS_LEVELS,
+                     cell_size: int = 10,
+                     num_catastrophes: int = 3,
+                     deadlines: tuple = (300, 600),
+                     demands: tuple = (50, 300),
+                     fleet_size: int = 10,
+                     num_depots: int = 3,
+                     categories: dict = None,
+                     num_destructive_nodes: int = 0,
+                     num_destructive_edges: int = 0,
+                     destruction_times: tuple = (100, 500),
+                     seed: int = 0):
+
+    if num_edges is None:
+        num_edges = 2 * num_nodes
+
+    if num_catastrophes + num_depots + num_destructive_nodes > num_nodes:
+        raise ValueError("Not enough nodes for the catastrophes, depots and destroyed nodes")
+
+    max_edges = num_nodes * len(EDGE_OFFSETS)
+    if num_edges > max_edges:
+        raise ValueError(f"Too many edges: at most {max_edges} edges for {num_nodes} nodes")
+
+    if categories is None:
+        categories = {
+            category: 1
+            for category, specs in VEHICLE_SPECS.items()
+            if travel_methods.get(specs[0], 0) > 0
+        }
+
+    rng = random.Random(seed)
+    width = ceil(num_nodes ** 0.5)
+
+    yield ["graph", "directed" if directed else "undirected"]
+
+    # Nodes, with their (jittered) positions in the grid
+    ys, xs = array('d'), array('d')
+    for index in range(num_nodes):
+        row, column = divmod(index, width)
+        ys.append(row + rng.uniform(-0.3, 0.3))
+        xs.append(column + rng.uniform(-0.3, 0.3))
+        yield ["node", node_name(index), rng.randrange(0, 60, 5)]
+
+    # Edges between nearby nodes
+    methods, method_weights = list(travel_methods.keys()), list(travel_methods.values())
+    levels, level_weights = list(access_levels.keys()), list(access_levels.values())
+    probability = num_edges / max_edges
+
+    destructive_edges = []
+    edge_count = 0
+    for index in range(num_nodes):
+        row, column = divmod(index, width)
+        for row_offset, column_offset in EDGE_OFFSETS:
+            neighbor_row, neighbor_column = row + row_offset, column + column_offset
+            neighbor = neighbor_row * width + neighbor_column
+            if not 0 <= neighbor_column < width or neighbor >= num_nodes:
+                continue
+            if rng.random() >= probability:
+                continue
+
+            distance = hypot(xs[neighbor] - xs[index], ys[neighbor] - ys[index])
+            distance = max(1, round(distance * cell_size))
+            travel_method = rng.choices(methods, method_weights)[0]
+            access_level = rng.choices(levels, level_weights)[0]
+
+            # Edges of directed graphs go in a random direction
+            node1, node2 = node_name(index), node_name(neighbor)
+            if directed and rng.random() < 0.5:
+                node1, node2 = node2, node1
+
+            yield ["edge", node1, node2, distance, round(rng.uniform(0.6, 1.0), 2),
+                   travel_method, access_level]
+
+            # Reservoir sampling of the destroyed edges
+            edge_count += 1
+            if len(destructive_edges) < num_destructive_edges:
+                destructive_edges.append((node1, node2))
+            else:
+                i = rng.randrange(edge_count)
+                if i < num_destructive_edges:
+                    destructive_edges[i] = (node1, node2)
+
+    # Catastrophes, depots and destroyed nodes on distinct nodes
+    special_nodes = rng.sample(range(num_nodes), num_catastrophes + num_depots + num_destructive_nodes)
+    catastrophe_nodes = special_nodes[:num_catastrophes]
+    depots = special_nodes[num_catastrophes:num_catastrophes + num_depots]
+    destructive_nodes = special_nodes[num_catastrophes + num_depots:]
+
+    for index in catastrophe_nodes:
+        kinds = rng.sample(SUPPLY_KINDS, rng.randint(1, len(SUPPLY_KINDS)))
+        yield ["catastrophe", node_name(index), rng.randint(*deadlines),
+               *(f"{kind}={rng.randrange(demands[0], demands[1] + 1, 5)}" for kind in kinds)]
+
+    # Vehicles, named after their category (e.g. "SmallBoat1")
+    names = list(categories.keys())
+    weights = list(categories.values())
+    category_counts = {}
+    for _ in range(fleet_size if depots else 0):
+        category = rng.choices(names, weights)[0]
+        category_counts[category] = category_counts.get(category, 0) + 1
+        name = category.title().replace("_", "") + str(category_counts[category])
+        yield ["vehicle", node_name(rng.choice(depots)), name, category]
+
+    for index in destructive_nodes:
+        yield ["destructive_node", node_name(index), rng.randint(*destruction_times)]
+
+    for node1, node2 in destructive_edges:
+        yield ["destructive_edge", node1, node2, rng.randint(*destruction_times)]
+
+
+# Builds the MissionPlanner object of a synthetic scenario
+# (see generate_records for the parameters)
+def generate_scenario(heuristic_option: int = 1, **params):
+    records = (
+        (line_number, record[0], record[1:])
+        for line_number, record in enumerate(generate_records(**params), start=1)
+    )
+    return init_planner(build_scenario(records), heuristic_option)
+
+
+# Streams a synthetic scenario to a scenario file
+# (see generate_records for the parameters)
+def write_scenario(path: str, **params) -> None:
+    with open(path, "w", newline="") as file:
+        csv.writer(file).writerows(generate_records(**params))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Synthetic scenario generator")
+    arg_parser.add_argument("path", help="Scenario file to be written")
+    arg_parser.add_argument("-n", "--nodes", type=int, default=1000, help="Number of nodes")
+    arg_parser.add_argument("-e", "--edges", type=int, help="Number of edges (default: 2 * nodes)")
+    arg_parser.add_argument("-d", "--directed", action="store_true", help="Directed graph")
+    arg_parser.add_argument("-c", "--catastrophes", type=int, default=3, help="Number of catastrophes")
+    arg_parser.add_argument("-f", "--fleet", type=int, default=10, help="Number of vehicles")
+    arg_parser.add_argument("--depots", type=int, default=3, help="Number of depots")
+    arg_parser.add_argument("--destructive-nodes", type=int, default=0,
+                            help="Number of destroyed nodes")
+    arg_parser.add_argument("--destructive-edges", type=int, default=0,
+                            help="Number of destroyed edges")
+    arg_parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    args = arg_parser.parse_args()
+
+    write_scenario(args.path,
+                   num_nodes=args.nodes,
+                   num_edges=args.edges,
+                   directed=args.directed,
+                   num_catastrophes=args.catastrophes,
+                   fleet_size=args.fleet,
+                   num_depots=args.depots,
+                   num_destructive_nodes=args.destructive_nodes,
+                   num_destructive_edges=args.destructive_edges,
+                   seed=args.seed)
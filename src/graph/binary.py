@@ -0,0 +1,89 @@
+# Binary snapshot files store typed arrays (sections) along with a JSON
+# metadata document, and are used to save and load graphs (see Graph.save
+# and Graph.load). The layout of a file is:
+# - header: magic bytes, format version and length of the metadata
+# - metadata: JSON document, with the table of sections in "sections"
+#   mapping each name to its offset (from the first section), typecode and shape
+# - sections: raw arrays in native byte order, each aligned to 8 bytes
+
+# Files are loaded by memory-mapping them and returning read-only memoryviews
+# over the sections, so the pages are only read from disk when used and are
+# shared by every process that loads the same file.
+
+import json
+import mmap
+import struct
+
+MAGIC   = b"IAGRAPH\0"
+VERSION = 1
+
+# magic, version, metadata length
+HEADER = struct.Struct("<8sIQ")
+
+ALIGNMENT = 8
+
+
+def align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Checks if the file at the given path is a binary snapshot file
+def is_binary(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+# Writes the metadata and the sections (arrays, bytearrays, memoryviews
+# or contiguous NumPy arrays, by name) to a binary snapshot file
+def write_binary(path: str, metadata: dict, sections: dict) -> None:
+    views = {name: memoryview(section) for name, section in sections.items()}
+
+    table = {}
+    offset = 0
+    for name, view in views.items():
+        table[name] = {"offset": offset, "typecode": view.format, "shape": list(view.shape)}
+        offset = align(offset + view.nbytes)
+
+    metadata = json.dumps({**metadata, "sections": table}).encode()
+    data_start = align(HEADER.size + len(metadata))
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+        file.write(metadata)
+
+        for name, view in views.items():
+            file.write(b"\0" * (data_start + table[name]["offset"] - file.tell()))
+            file.write(view)
+
+
+# Memory-maps a binary snapshot file.
+# Returns the metadata and a dictionary of flat read-only memoryviews over
+# the sections (the shapes are in metadata["sections"])
+def read_binary(path: str) -> (dict, dict):
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"Invalid binary snapshot file: {path}")
+
+    magic, version, metadata_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid binary snapshot file: {path}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary snapshot version {version} (expected {VERSION})")
+
+    metadata = json.loads(buffer[HEADER.size:HEADER.size + metadata_length])
+    data_start = align(HEADER.size + metadata_length)
+
+    view = memoryview(buffer)
+    sections = {}
+    for name, section in metadata["sections"].items():
+        count = 1
+        for size in section["shape"]:
+            count *= size
+
+        start = data_start + section["offset"]
+        length = count * struct.calcsize(section["typecode"])
+        sections[name] = view[start:start + length].cast(section["typecode"])
+
+    return metadata, sections
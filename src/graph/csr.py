@@ -0,0 +1,283 @@
+# The CSRGraph class holds a compact, array-backed (compressed sparse row)
+# copy of the graph adjacency, indexed by the graph's integer node ids.
+# It holds the following attributes:
+# - offsets: the edges of the node with id u are in range(offsets[u], offsets[u + 1])
+# - targets: id of the destination node of each edge
+# - distances: distance of each edge
+# - speed_mults: speed multiplier of each edge
+# - travel_methods: travel method code of each edge
+# - access_levels: access level of each edge
+# - edge_ids: id of each edge in the graph edge index
+# - live_edges: dictionary to map the ids of the nodes that lost edges since
+#   the CSR form was built to the list of their remaining edges
+# - integer_distances: boolean indicating if the distances are integers
+# - travel_method_names: list to map the travel method codes to their names
+
+# The edges of each node are stored in the same order as in the dictionary
+# adjacency, so iterating the CSR form visits the neighbors in the same order.
+# Ids of destroyed nodes (tombstones) have an empty range of edges.
+
+# Destroyed edges are removed in place (see remove_dead_edges): the arrays are
+# left untouched and the remaining edges of the nodes that lost edges are kept
+# in live_edges, so a destruction costs O(degree) instead of rebuilding the
+# CSR form. The edges must always be iterated with edges(), which skips them.
+
+# The arrays are either array.array objects or read-only memoryviews of the
+# same item types (e.g. over a memory-mapped file, see Graph.load).
+
+from array import array
+from heapq import heappush, heappop
+import copy
+
+
+class CSRGraph:
+    def __init__(self, num_nodes: int = 0, integer_distances: bool = True):
+        self.offsets = array('q', [0] * (num_nodes + 1))
+        self.targets = array('q')
+        self.distances = array(self.get_distance_typecode(integer_distances))
+        self.speed_mults = array('d')
+        self.travel_methods = array('b')
+        self.access_levels = array('b')
+        self.edge_ids = array('q')
+        self.travel_method_names = []
+        self.integer_distances = integer_distances
+        self.live_edges = {}
+        self._edge_classes = None
+
+    def __str__(self):
+        return (
+            f"CSRGraph(nodes: {self.get_num_nodes()}, "
+            f"edges: {self.get_num_edges()})"
+        )
+
+    def __repr__(self):
+        return str(self)
+
+    # Returns a copy sharing the arrays, whose edges can be removed
+    # without changing this CSR form
+    def copy(self) -> 'CSRGraph':
+        csr = copy.copy(self)
+        csr.live_edges = self.live_edges.copy()
+        return csr
+
+    @staticmethod
+    def get_distance_typecode(integer_distances: bool) -> str:
+        return 'q' if integer_distances else 'd'
+
+    def get_num_nodes(self):
+        return len(self.offsets) - 1
+
+    # NOTE includes the removed edges (see remove_dead_edges)
+    def get_num_edges(self):
+        return len(self.targets)
+
+    # Returns the edge indexes leaving the node with the given id
+    # (a range, or a list if the node lost edges)
+    def edges(self, node_id: int):
+        live_edges = self.live_edges.get(node_id, None)
+        if live_edges is not None:
+            return live_edges
+        return range(self.offsets[node_id], self.offsets[node_id + 1])
+
+    # Removes in place the edges of the given nodes whose ids are cleared in
+    # edge_alive (see Graph.destroy), in O(degree) for each node
+    def remove_dead_edges(self, node_ids, edge_alive) -> None:
+        edge_ids = self.edge_ids
+        for node_id in node_ids:
+            self.live_edges[node_id] = [
+                edge for edge in self.edges(node_id) if edge_alive[edge_ids[edge]]
+            ]
+
+    def get_travel_method_code(self, travel_method: str) -> int:
+        if travel_method not in self.travel_method_names:
+            self.travel_method_names.append(travel_method)
+        return self.travel_method_names.index(travel_method)
+
+    def get_edge_info(self, edge: int) -> tuple:
+        return (
+            self.distances[edge],
+            self.speed_mults[edge],
+            self.travel_method_names[self.travel_methods[edge]],
+            self.access_levels[edge]
+        )
+
+    # Returns the set of (travel_method, access_level) pairs of the edges
+    # NOTE the removed edges are counted, so the views (see Graph.get_view_key)
+    # of the classes stay the same when edges are destroyed
+    def get_edge_classes(self) -> set:
+        if self._edge_classes is None:
+            self._edge_classes = {
+                (self.travel_method_names[code], access_level)
+                for code, access_level in set(zip(self.travel_methods, self.access_levels))
+            }
+        return self._edge_classes
+
+    # Calculates the shortest distance from the source node to every node
+    # using Dijkstra's algorithm with a priority queue.
+    # Returns a list indexed by the node ids with infinity for the nodes without any path
+    def shortest_distances(self, source: int) -> list:
+        targets = self.targets
+        edge_distances = self.distances
+
+        priority_queue = [(0, source)]  # (current_distance, current_node_id)
+        distances = [float('inf')] * self.get_num_nodes()
+        distances[source] = 0
+
+        while priority_queue:
+            current_distance, current_node = heappop(priority_queue)
+
+            # Skip processing if this is not the shortest path to current_node
+            if current_distance > distances[current_node]:
+                continue
+
+            for edge in self.edges(current_node):
+                new_distance = current_distance + edge_distances[edge]
+
+                neighbor = targets[edge]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    heappush(priority_queue, (new_distance, neighbor))
+
+        return distances
+
+    # Builds a new CSR form with only the edges that can be traveled with
+    # the given travel method and access level (all the edges if the travel
+    # method is None), keeping the edge order
+    def filter(self, travel_method: str, access_level: int) -> 'CSRGraph':
+        csr = CSRGraph(self.get_num_nodes(), self.integer_distances)
+        csr.travel_method_names = self.travel_method_names.copy()
+
+        if travel_method is not None and travel_method not in self.travel_method_names:
+            return csr
+
+        code = self.travel_method_names.index(travel_method) if travel_method is not None else None
+        for node_id in range(self.get_num_nodes()):
+            for edge in self.edges(node_id):
+                if code is not None and (self.travel_methods[edge] != code
+                                         or self.access_levels[edge] > access_level):
+                    continue
+
+                csr.targets.append(self.targets[edge])
+                csr.distances.append(self.distances[edge])
+                csr.speed_mults.append(self.speed_mults[edge])
+                csr.travel_methods.append(self.travel_methods[edge])
+                csr.access_levels.append(self.access_levels[edge])
+                csr.edge_ids.append(self.edge_ids[edge])
+
+            csr.offsets[node_id + 1] = len(csr.targets)
+
+        return csr
+
+    # Builds a new CSR form without the removed edges (see remove_dead_edges)
+    def compact(self) -> 'CSRGraph':
+        return self.filter(None, None)
+
+    # Builds a new CSR form with the direction of every edge reversed
+    def reverse(self) -> 'CSRGraph':
+        csr = CSRGraph(self.get_num_nodes(), self.integer_distances)
+        csr.travel_method_names = self.travel_method_names.copy()
+
+        # Count the incoming edges of each node
+        num_edges = 0
+        for node_id in range(self.get_num_nodes()):
+            for edge in self.edges(node_id):
+                csr.offsets[self.targets[edge] + 1] += 1
+                num_edges += 1
+        for node_id in range(self.get_num_nodes()):
+            csr.offsets[node_id + 1] += csr.offsets[node_id]
+
+        csr.targets = array('q', [0] * num_edges)
+        csr.distances = array(self.get_distance_typecode(self.integer_distances), [0] * num_edges)
+        csr.speed_mults = array('d', [0] * num_edges)
+        csr.travel_methods = array('b', [0] * num_edges)
+        csr.access_levels = array('b', [0] * num_edges)
+        csr.edge_ids = array('q', [0] * num_edges)
+
+        # Place each edge in the range of its target node
+        next_edge = csr.offsets[:-1]
+        for node_id in range(self.get_num_nodes()):
+            for edge in self.edges(node_id):
+                target = self.targets[edge]
+                reverse_edge = next_edge[target]
+                next_edge[target] += 1
+
+                csr.targets[reverse_edge] = node_id
+                csr.distances[reverse_edge] = self.distances[edge]
+                csr.speed_mults[reverse_edge] = self.speed_mults[edge]
+                csr.travel_methods[reverse_edge] = self.travel_methods[edge]
+                csr.access_levels[reverse_edge] = self.access_levels[edge]
+                csr.edge_ids[reverse_edge] = self.edge_ids[edge]
+
+        return csr
+
+    # Builds the CSR form from the dictionary adjacency of a graph
+    @classmethod
+    def from_adjacency(cls, adjacency: dict, id_nodes: list, node_ids: dict) -> 'CSRGraph':
+        integer_distances = all(
+            isinstance(edge_info[0], int)
+            for adj_nodes in adjacency.values()
+            for _, edge_info in adj_nodes.values()
+        )
+        csr = cls(len(id_nodes), integer_distances)
+
+        for node_id, node in enumerate(id_nodes):
+            if node is not None:
+                edges = adjacency[node].items()
+            else:
+                edges = ()
+
+            for edge_id, (adjacent, (distance, speed_mult, travel_method, access_level)) in edges:
+                csr.targets.append(node_ids[adjacent.name])
+                csr.distances.append(distance)
+                csr.speed_mults.append(speed_mult)
+                csr.travel_methods.append(csr.get_travel_method_code(travel_method))
+                csr.access_levels.append(access_level)
+                csr.edge_ids.append(edge_id)
+
+            csr.offsets[node_id + 1] = len(csr.targets)
+
+        return csr
+
+    # Builds the CSR form from existing arrays (or memoryviews) without copying them
+    @classmethod
+    def from_buffers(cls, buffers: dict, travel_method_names: list) -> 'CSRGraph':
+        csr = cls(0, memoryview(buffers["distances"]).format == 'q')
+        for name in ("offsets", "targets", "distances", "speed_mults",
+                     "travel_methods", "access_levels", "edge_ids"):
+            setattr(csr, name, buffers[name])
+        csr.travel_method_names = list(travel_method_names)
+        return csr
+
+    # The memoryviews (e.g. of memory-mapped files) can't be pickled,
+    # so they are pickled as copies in array.array objects
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name, buffer in self.get_buffers().items():
+            if isinstance(buffer, memoryview):
+                state[name] = array(buffer.format, buffer.tobytes())
+        return state
+
+    # Returns the arrays of the CSR form by name, see from_buffers
+    def get_buffers(self) -> dict:
+        return {
+            "offsets": self.offsets,
+            "targets": self.targets,
+            "distances": self.distances,
+            "speed_mults": self.speed_mults,
+            "travel_methods": self.travel_methods,
+            "access_levels": self.access_levels,
+            "edge_ids": self.edge_ids
+        }
+
+    # Builds the dictionary adjacency of a graph from the CSR form
+    def to_adjacency(self, id_nodes: list) -> dict:
+        adjacency = {}
+        for node_id, node in enumerate(id_nodes):
+            if node is None:
+                continue
+
+            adjacency[node] = {
+                self.edge_ids[edge]: (id_nodes[self.targets[edge]], self.get_edge_info(edge))
+                for edge in self.edges(node_id)
+            }
+        return adjacency
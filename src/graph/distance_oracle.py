@@ -0,0 +1,493 @@
+# The DistanceOracle class holds the all-pairs shortest distances of a graph
+# for each capability class (view) as NumPy arrays indexed by the node ids.
+# It holds the following attributes:
+# - graph: graph the distances are computed on
+# - method: "floyd_warshall", "dijkstra" or "auto"
+# - tables: dictionary to store a DistanceTable for each view key
+
+# The tables are computed with:
+# - floyd_warshall: vectorized min-plus Floyd-Warshall, suited for small dense graphs
+# - dijkstra: a Dijkstra run per row (or column), filled on demand, suited for
+#   large sparse graphs where only a few rows are needed
+# - auto: floyd_warshall for graphs up to FLOYD_WARSHALL_MAX_NODES nodes or
+#   dense graphs up to FLOYD_WARSHALL_DENSE_MAX_NODES nodes, dijkstra otherwise
+
+# When nodes or edges are destroyed the tables are repaired instead of rebuilt
+# (decremental shortest paths): for each computed row (or column) only the nodes
+# whose shortest path may go through a destroyed edge are recomputed, with a
+# Dijkstra restricted to them and seeded from the unaffected nodes.
+# The views of the graph are kept across the destruction, with the destroyed
+# edges removed in place (see Graph.destroy), so the plan holds the views it
+# was made on and the repair walks them without rebuilding any view.
+
+import numpy as np
+
+from array import array
+from heapq import heappush, heappop
+import copy
+
+FLOYD_WARSHALL_MAX_NODES       = 256
+FLOYD_WARSHALL_DENSE_MAX_NODES = 2048
+FLOYD_WARSHALL_MIN_DENSITY     = 0.05
+
+# Relative tolerance to consider an edge part of a shortest path
+TIGHT_TOLERANCE = 1e-9
+
+
+###
+# Utility functions
+###
+
+# Checks if a path with the given distance is as short as the shortest distance
+def is_tight(distance, shortest_distance) -> bool:
+    return (
+        shortest_distance != np.inf
+        and distance <= shortest_distance + TIGHT_TOLERANCE * max(1, abs(shortest_distance))
+    )
+
+
+# Returns the nodes reachable from the start node through edges that belong
+# to a shortest path according to the distances of a row (or a column, with
+# the reversed view), i.e. the nodes whose distance may depend on the start node
+def tight_region(view, distances, start: int) -> set:
+    targets = view.targets
+    edge_distances = view.distances
+
+    region = {start}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        for edge in view.edges(node):
+            neighbor = targets[edge]
+            if neighbor not in region and is_tight(distances[node] + edge_distances[edge],
+                                                   distances[neighbor]):
+                region.add(neighbor)
+                stack.append(neighbor)
+
+    return region
+
+
+# Recomputes in place the distances of the region nodes of a row (or a column,
+# with the reversed views), keeping the distances of the other nodes
+def repair_distances(distances, region: set, view, reverse_view) -> None:
+    for node in region:
+        distances[node] = np.inf
+
+    # Seed the region with the edges coming from unaffected nodes
+    priority_queue = []
+    for node in region:
+        for edge in reverse_view.edges(node):
+            previous = reverse_view.targets[edge]
+            if previous in region:
+                continue
+
+            new_distance = distances[previous] + reverse_view.distances[edge]
+            if new_distance < distances[node]:
+                distances[node] = new_distance
+                heappush(priority_queue, (new_distance, node))
+
+    # Dijkstra's algorithm restricted to the region
+    while priority_queue:
+        current_distance, current_node = heappop(priority_queue)
+
+        if current_distance > distances[current_node]:
+            continue
+
+        for edge in view.edges(current_node):
+            neighbor = view.targets[edge]
+            if neighbor not in region:
+                continue
+
+            new_distance = current_distance + view.distances[edge]
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                heappush(priority_queue, (new_distance, neighbor))
+
+
+###
+# DistanceTable class
+###
+
+# Distances of a single view, either as a full matrix (dense) or as the rows
+# and columns computed so far (sparse)
+class DistanceTable:
+    def __init__(self, num_nodes: int, integer_distances: bool, dense: bool):
+        self.num_nodes = num_nodes
+        self.integer_distances = integer_distances
+        self.matrix = np.full((num_nodes, num_nodes), np.inf) if dense else None
+        self.rows = {}
+        self.columns = {}
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def is_dense(self) -> bool:
+        return self.matrix is not None
+
+    # Converts a distance to a python number (int if the edge distances are)
+    def to_number(self, distance):
+        if self.integer_distances and distance != np.inf:
+            return int(distance)
+        return float(distance)
+
+    # Returns the distances from the node, or None if not computed
+    def get_row(self, node_id: int):
+        if self.matrix is not None:
+            return self.matrix[node_id, :]
+        return self.rows.get(node_id, None)
+
+    # Returns the distances to the node, or None if not computed
+    def get_column(self, node_id: int):
+        if self.matrix is not None:
+            return self.matrix[:, node_id]
+        return self.columns.get(node_id, None)
+
+    def set_row(self, node_id: int, distances: list) -> None:
+        self.rows[node_id] = np.array(distances, dtype=np.float64)
+
+    def set_column(self, node_id: int, distances: list) -> None:
+        self.columns[node_id] = np.array(distances, dtype=np.float64)
+
+    # Returns the arrays of the table by name, to be saved in a binary snapshot
+    def get_arrays(self) -> dict:
+        if self.matrix is not None:
+            return {"matrix": self.matrix}
+
+        arrays = {}
+        for name, vectors in (("rows", self.rows), ("columns", self.columns)):
+            ids = sorted(vectors.keys())
+            arrays[name + "_ids"] = array('q', ids)
+            arrays[name] = np.array(
+                [vectors[node_id] for node_id in ids], dtype=np.float64
+            ).reshape(len(ids), self.num_nodes)
+        return arrays
+
+    # Builds a table from the arrays given by get_arrays (or memoryviews of them)
+    # without copying them
+    @classmethod
+    def from_arrays(cls, num_nodes: int, integer_distances: bool, arrays: dict) -> 'DistanceTable':
+        table = cls(num_nodes, integer_distances, dense=False)
+
+        if "matrix" in arrays:
+            table.matrix = np.asarray(arrays["matrix"]).reshape(num_nodes, num_nodes)
+            return table
+
+        for name, vectors in (("rows", table.rows), ("columns", table.columns)):
+            ids = arrays[name + "_ids"]
+            matrix = np.asarray(arrays[name]).reshape(len(ids), num_nodes)
+            vectors.update(zip(ids, matrix))
+        return table
+
+    # Clears the distances from and to a destroyed node. Node ids are never
+    # reused, so the ids of the other nodes (and their distances) stay valid
+    def clear_node(self, node_id: int) -> None:
+        if self.matrix is not None:
+            self.matrix[node_id, :] = np.inf
+            self.matrix[:, node_id] = np.inf
+            return
+
+        self.rows.pop(node_id, None)
+        self.columns.pop(node_id, None)
+        for distances in self.rows.values():
+            distances[node_id] = np.inf
+        for distances in self.columns.values():
+            distances[node_id] = np.inf
+
+
+###
+# DistanceOracle class
+###
+
+class DistanceOracle:
+    def __init__(self, graph, method: str = "auto"):
+        if method not in {"auto", "floyd_warshall", "dijkstra"}:
+            raise ValueError(f"Invalid distance oracle method: {method}")
+
+        self.graph = graph
+        self.method = method
+        self.tables = {}
+        self._shared = False
+
+    def __str__(self):
+        return f"DistanceOracle(method: {self.method}, tables: {len(self.tables)})"
+
+    def __repr__(self):
+        return str(self)
+
+    # The tables are shared with the copies of the graph (or with a loaded
+    # binary snapshot), the first update copies the tables before repairing them
+    def __deepcopy__(self, memo):
+        oracle = DistanceOracle(copy.deepcopy(self.graph, memo), self.method)
+        oracle.tables = self.tables
+        oracle._shared = self._shared = True
+        return oracle
+
+    # Drops every table, must be called when the graph is modified
+    # without calling prepare_update and apply_update
+    def clear(self):
+        self.tables = {}
+        self._shared = False
+
+    def select_method(self, view) -> str:
+        if self.method != "auto":
+            return self.method
+
+        num_nodes = view.get_num_nodes()
+        if num_nodes <= FLOYD_WARSHALL_MAX_NODES:
+            return "floyd_warshall"
+
+        density = view.get_num_edges() / (num_nodes * num_nodes)
+        if num_nodes <= FLOYD_WARSHALL_DENSE_MAX_NODES and density >= FLOYD_WARSHALL_MIN_DENSITY:
+            return "floyd_warshall"
+
+        return "dijkstra"
+
+    def get_table(self, vehicle) -> DistanceTable:
+        key = self.graph.get_view_key(vehicle)
+
+        table = self.tables.get(key, None)
+        if table is None:
+            view = self.graph.get_view(vehicle)
+            dense = self.select_method(view) == "floyd_warshall"
+            table = DistanceTable(view.get_num_nodes(), view.integer_distances, dense)
+
+            if dense:
+                self.floyd_warshall(view, table)
+
+            self.tables[key] = table
+
+        return table
+
+    # Fills the whole table with the vectorized min-plus Floyd-Warshall algorithm
+    def floyd_warshall(self, view, table: DistanceTable) -> None:
+        num_nodes = view.get_num_nodes()
+        matrix = table.matrix
+
+        # Direct edges, keeping the shortest one between each pair of nodes
+        offsets = np.frombuffer(view.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(num_nodes), np.diff(offsets))
+        targets = np.frombuffer(view.targets, dtype=np.int64)
+        distances = np.array(view.distances, dtype=np.float64)
+
+        # Skip the edges removed in place (see CSRGraph.remove_dead_edges)
+        if view.live_edges:
+            live = np.ones(len(targets), dtype=bool)
+            for node_id, live_edges in view.live_edges.items():
+                live[offsets[node_id]:offsets[node_id + 1]] = False
+                live[live_edges] = True
+            sources, targets, distances = sources[live], targets[live], distances[live]
+
+        np.minimum.at(matrix, (sources, targets), distances)
+        np.fill_diagonal(matrix, 0)
+
+        for k in range(num_nodes):
+            np.minimum(matrix, matrix[:, k, None] + matrix[None, k, :], out=matrix)
+
+    def _fill_row(self, table: DistanceTable, vehicle, node_id: int):
+        view = self.graph.get_view(vehicle)
+        table.set_row(node_id, view.shortest_distances(node_id))
+        return table.get_row(node_id)
+
+    def _fill_column(self, table: DistanceTable, vehicle, node_id: int):
+        view = self.graph.get_view(vehicle, reverse=True)
+        table.set_column(node_id, view.shortest_distances(node_id))
+        return table.get_column(node_id)
+
+    # Computes every row of the tables of the given vehicles
+    def compute(self, vehicles: list) -> None:
+        for vehicle in vehicles:
+            table = self.get_table(vehicle)
+            for node_id in range(table.num_nodes):
+                if table.get_row(node_id) is None:
+                    self._fill_row(table, vehicle, node_id)
+
+    ###
+    # Query methods
+    ###
+
+    # Returns the shortest distance from node1 to node2 considering the
+    # vehicle's travel method and access level, infinity if there isn't any
+    # path or None if the nodes are not in the graph
+    def get_distance(self, node1, node2, vehicle):
+        source = self.graph.get_node_id(node1)
+        target = self.graph.get_node_id(node2)
+
+        if source is None or target is None:
+            return None
+
+        table = self.get_table(vehicle)
+
+        row = table.get_row(source)
+        if row is not None:
+            return table.to_number(row[target])
+
+        column = table.get_column(target)
+        if column is not None:
+            return table.to_number(column[source])
+
+        row = self._fill_row(table, vehicle, source)
+        return table.to_number(row[target])
+
+    # Returns the distances from the node to every node, indexed by node id
+    def get_row(self, node, vehicle) -> np.ndarray:
+        source = self.graph.get_node_id(node)
+
+        if source is None:
+            return None
+
+        table = self.get_table(vehicle)
+        row = table.get_row(source)
+        if row is None:
+            row = self._fill_row(table, vehicle, source)
+
+        return row
+
+    # Returns the distances from every node to the node, indexed by node id
+    def get_column(self, node, vehicle) -> np.ndarray:
+        target = self.graph.get_node_id(node)
+
+        if target is None:
+            return None
+
+        table = self.get_table(vehicle)
+        column = table.get_column(target)
+        if column is None:
+            column = self._fill_column(table, vehicle, target)
+
+        return column
+
+    # Returns the distances from every node to the node as a list of python
+    # numbers indexed by node id, same as Graph.get_distances_to
+    def get_distances_to(self, node, vehicle) -> list:
+        column = self.get_column(node, vehicle)
+
+        if column is None:
+            return None
+
+        table = self.get_table(vehicle)
+        return [table.to_number(distance) for distance in column]
+
+    # Returns the whole distance matrix of the vehicle
+    def get_matrix(self, vehicle) -> np.ndarray:
+        table = self.get_table(vehicle)
+        if table.is_dense():
+            return table.matrix
+
+        self.compute([vehicle])
+        return np.array([table.get_row(node_id) for node_id in range(table.num_nodes)])
+
+    ###
+    # Decremental update methods
+    ###
+
+    # Finds the rows and columns of each table affected by the destruction of
+    # nodes and/or edges. Must be called before modifying the graph.
+    # - removed_nodes: list of ids of the nodes to be destroyed
+    # - removed_edges: list of (node1_id, node2_id, edge_info) edges to be destroyed
+    # Returns the update plan to be given to apply_update after modifying the graph
+    def prepare_update(self, removed_nodes: list = (), removed_edges: list = ()) -> dict:
+        plan = {}
+
+        for key, table in self.tables.items():
+            rows, columns = {}, {}
+
+            # Classes without edges are not affected by the destruction of edges
+            if key is None:
+                plan[key] = (None, None, rows, columns)
+                continue
+
+            view = self.graph.get_view(key)
+            reverse_view = self.graph.get_view(key, reverse=True)
+            plan[key] = (view, reverse_view, rows, columns)
+
+            # Edges of the view to be destroyed
+            edges = [
+                (node1, node2, distance)
+                for node1, node2, (distance, _, travel_method, access_level) in removed_edges
+                if travel_method == key[0] and access_level <= key[1]
+            ]
+            for removed_node in removed_nodes:
+                edges += [
+                    (removed_node, view.targets[edge], view.distances[edge])
+                    for edge in view.edges(removed_node)
+                ]
+                edges += [
+                    (reverse_view.targets[edge], removed_node, reverse_view.distances[edge])
+                    for edge in reverse_view.edges(removed_node)
+                ]
+
+            for node1, node2, distance in edges:
+                # Rows where the edge belongs to a shortest path to node2
+                if table.is_dense():
+                    matrix = table.matrix
+                    candidates = np.flatnonzero(
+                        np.isfinite(matrix[:, node2])
+                        & (matrix[:, node1] + distance
+                           <= matrix[:, node2] + TIGHT_TOLERANCE * np.maximum(1, np.abs(matrix[:, node2])))
+                    )
+                else:
+                    candidates = list(table.rows.keys())
+
+                for source in candidates:
+                    row = table.get_row(source)
+                    if is_tight(row[node1] + distance, row[node2]):
+                        region = rows.setdefault(int(source), set())
+                        if node2 not in region:
+                            region |= tight_region(view, row, node2)
+
+                # Columns where the edge belongs to a shortest path from node1
+                # NOTE dense columns are repaired along with the rows
+                for target, column in table.columns.items():
+                    if is_tight(column[node2] + distance, column[node1]):
+                        region = columns.setdefault(target, set())
+                        if node1 not in region:
+                            region |= tight_region(reverse_view, column, node1)
+
+        return plan
+
+    # Repairs the tables with the plan given by prepare_update.
+    # Must be called after modifying the graph and removing the destroyed
+    # edges from its views (the views of the plan)
+    # Returns the set of ids of the nodes whose distances from or to
+    # some node may have changed
+    def apply_update(self, plan: dict, removed_nodes: list = ()) -> set:
+        # Copy the tables shared with other graphs before repairing them
+        if self._shared:
+            self.tables = {key: table.copy() for key, table in self.tables.items()}
+            self._shared = False
+
+        removed_nodes = set(removed_nodes)
+        damaged = set()
+
+        for key, (view, reverse_view, rows, columns) in plan.items():
+            table = self.tables[key]
+
+            if removed_nodes:
+                for removed_node in removed_nodes:
+                    table.clear_node(removed_node)
+
+                rows = {
+                    source: region - removed_nodes
+                    for source, region in rows.items() if source not in removed_nodes
+                }
+                columns = {
+                    target: region - removed_nodes
+                    for target, region in columns.items() if target not in removed_nodes
+                }
+
+            if key is None:
+                continue
+
+            for source, region in rows.items():
+                repair_distances(table.get_row(source), region, view, reverse_view)
+                damaged |= region
+                damaged.add(source)
+
+            for target, region in columns.items():
+                repair_distances(table.get_column(target), region, reverse_view, view)
+                damaged |= region
+                damaged.add(target)
+
+        # NOTE the keys of the tables stay the same, as the view keys count
+        # the destroyed edges (see CSRGraph.get_edge_classes)
+        return damaged
@@ -1,25 +1,62 @@
 # The Graph class holds the following attributes:
 # - directed: boolean indicating if the graph is directed
-# - nodes: list of nodes
+# - nodes: read-only view of the nodes (in insertion order)
+# - node_index: dictionary to map the node names to the nodes
+# - node_ids: dictionary to map the node names to integer ids
+# - id_nodes: list to map the integer ids to the nodes (None for destroyed nodes)
+# - edge_index: dictionary to map (node1_name, node2_name, travel_method) to edge ids
+# - edge_alive: flags indexed by edge id, cleared when the edge is destroyed
 # - graph: dictionary to store nodes, edges and costs
+#   (each node maps to a dictionary {edge_id: (adjacent_node, edge_info)})
+# - csr: compact array-backed (CSR) form of the graph adjacency
+# - views: filtered CSR forms with the edges traversable by each capability class
+#   (the CSR form and the views are kept when nodes and edges are destroyed,
+#   the destroyed edges are removed from them in place, see destroy)
+# - oracle: optional all-pairs distance oracle answering the distance queries
 # - h: dictionary to store heuristic values
+# - heuristic: (heuristic function, parameters) used to build the heuristic values
+# - damaged_nodes: names of the nodes whose distances may have changed since
+#   the last heuristic update (None if unknown, i.e. all of them)
+# - version: number of destructions of the graph, so the results computed on
+#   the graph can be checked against the destructions made since then
+# - destructions: (affected_nodes, damaged_nodes) names of each destruction (see destroy)
 # - destructive_nodes: dictionary of destructive nodes conditions
 # - destructive_edges: dictionary of destructive edges conditions
 
 # The Graph class holds the following methods:
 # - string representation of the graph
-# - print, count, add and remove edges
+# - print, count, add (one by one or in bulk) and destroy nodes and edges
 # - add/update heuristic values to nodes
+# - freeze/thaw the adjacency into/from the compact CSR form
+# - get the adjacency view traversable by a vehicle
+# - take copy-on-write snapshots of the graph for the searches
+# - save/load the graph to/from a memory-mapped binary snapshot file
 # - draw the graph using matplotlib or graphviz
 
 # Edge info: (distance, speed_multiplier, travel_method, access_level)
 
-from .node import Node
-from vehicle import convert_access_level_to_str
+# Node and edge ids are assigned in insertion order and never reused:
+# destroyed nodes and edges leave a tombstone (None in id_nodes, a cleared
+# flag in edge_alive), so the ids of the remaining ones stay valid and
+# destroying a node or an edge only touches its incident edges, in the
+# dictionary adjacency as well as in the CSR form and the views.
+# The edges of undirected graphs share the same id in both directions.
 
+from .node import Node
+from .csr  import CSRGraph
+from .binary import read_binary, write_binary
+from .distance_oracle import DistanceOracle, DistanceTable
+from . import heurisitics
+from catastrophe import Catastrophe
+from supply      import Supply
+from vehicle     import Vehicle, convert_access_level_to_str
+
+from array import array
 from heapq import heappush, heappop
 import copy
 
+import numpy as np
+
 # Libraries for graphical representation
 import networkx as nx
 import matplotlib.pyplot as plt
@@ -32,9 +69,21 @@ from graphviz import (
 class Graph:
     def __init__(self, directed: bool = False):
         self.directed = directed
-        self.nodes = []
-        self.graph = {}
+        self.node_index = {}
+        self.node_ids = {}
+        self.id_nodes = []
+        self._edge_index = {}
+        self.edge_alive = bytearray()
+        self._adjacency = {}
+        self._incoming = {}
+        self._csr = None
+        self._views = {}
+        self.oracle = None
         self.h = {}
+        self.heuristic = None
+        self.damaged_nodes = set()
+        self.version = 0
+        self.destructions = []
         self.destructive_nodes = {}
         self.destructive_edges = {}
 
@@ -42,7 +91,7 @@ class Graph:
         out = ""
         for key_node, adj_nodes in self.graph.items():
             if adj_nodes:
-                adj_nodes = ", ".join([f'({n.name}, {c})' for n, c in adj_nodes])
+                adj_nodes = ", ".join([f'({n.name}, {c})' for n, c in adj_nodes.values()])
             else:
                 adj_nodes = "None"
             out += f"{key_node.name}: {adj_nodes}\n"
@@ -52,12 +101,361 @@ class Graph:
         return str(self)
 
     def copy(self):
-        return copy.deepcopy(self)
+        # The arrays of the CSR form and the views are never modified,
+        # so they are shared with the copy (as are the oracle tables),
+        # only the edges removed from them are copied (see CSRGraph.copy)
+        return copy.deepcopy(self, {
+            id(self._csr): self._csr.copy() if self._csr is not None else None,
+            id(self._views): {key: view.copy() for key, view in self._views.items()}
+        })
+
+    # Returns an isolated copy-on-write view of the graph (see GraphSnapshot)
+    def snapshot(self):
+        return GraphSnapshot(self)
+
+    # Read-only view of the nodes of the graph in insertion order
+    # (not a copy, so the graph must not be modified while iterating it)
+    @property
+    def nodes(self):
+        return self.node_index.values()
+
+    # Dictionary adjacency of the graph (thaws the graph if it's frozen)
+    @property
+    def graph(self):
+        if self._adjacency is None:
+            self.thaw()
+        return self._adjacency
+
+    @graph.setter
+    def graph(self, adjacency):
+        self._adjacency = adjacency
+        self._csr = None
+
+    # Compact array-backed adjacency of the graph, built on demand
+    # and cached until the graph is modified
+    @property
+    def csr(self):
+        if self._csr is None:
+            self._csr = CSRGraph.from_adjacency(self._adjacency, self.id_nodes, self.node_ids)
+        return self._csr
+
+    def is_frozen(self):
+        return self._adjacency is None
+
+    # Converts the adjacency to the CSR form and releases the dictionary form
+    def freeze(self):
+        csr = self.csr
+        self._adjacency = None
+        self._incoming = None
+        self._edge_index = None
+        return csr
+
+    # Rebuilds the dictionary form of the adjacency from the CSR form
+    def thaw(self):
+        if self._adjacency is None:
+            self._adjacency = self._csr.to_adjacency(self.id_nodes)
+            self._incoming = self._build_incoming()
+            self._edge_index = {
+                (node1.name, node2.name, edge_info[2]): edge_id
+                for node1, adj_nodes in self._adjacency.items()
+                for edge_id, (node2, edge_info) in adj_nodes.items()
+            }
+
+    # Edge index of the graph (thaws the graph if it's frozen)
+    @property
+    def edge_index(self):
+        if self._edge_index is None:
+            self.thaw()
+        return self._edge_index
+
+    # Incoming edges of each node of a directed graph, as dictionaries
+    # {edge_id: source_node}, to remove the edges of a node in O(degree).
+    # Undirected graphs already store every edge in both directions.
+    def _build_incoming(self):
+        if not self.directed:
+            return {}
+
+        incoming = {node: {} for node in self._adjacency}
+        for node, adj_nodes in self._adjacency.items():
+            for edge_id, (adjacent, _) in adj_nodes.items():
+                incoming[adjacent][edge_id] = node
+        return incoming
+
+    # Returns the key of the view of the vehicle (or capability class).
+    # Capability classes that can travel through the same edges share the key.
+    def get_view_key(self, vehicle):
+        if isinstance(vehicle, tuple):
+            travel_method, access_level = vehicle
+        else:
+            travel_method, access_level = vehicle.get_capability_class()
+
+        # Classes of the same travel method share the view if there are no edges
+        # with an access level between their access levels
+        edge_level = max((
+            level
+            for method, level in self.csr.get_edge_classes()
+            if method == travel_method and level <= access_level
+        ), default=None)
+
+        # Classes that can't travel through any edge share the empty view
+        return (travel_method, edge_level) if edge_level is not None else None
+
+    # Returns the CSR form with only the edges the vehicle (or capability class)
+    # can travel through. Views are cached and shared by the capability classes
+    # that can travel through the same edges in this graph.
+    # If reverse is set, the direction of the edges of the view is reversed.
+    def get_view(self, vehicle, reverse: bool = False):
+        key = self.get_view_key(vehicle)
+
+        # Undirected graphs store every edge in both directions
+        if reverse and self.directed:
+            view = self._views.get(("reverse", key), None)
+            if view is None:
+                view = self.get_view(vehicle).reverse()
+                self._views[("reverse", key)] = view
+            return view
+
+        view = self._views.get(key, None)
+        if view is None:
+            if isinstance(vehicle, tuple):
+                travel_method, access_level = vehicle
+            else:
+                travel_method, access_level = vehicle.get_capability_class()
+
+            view = self.csr.filter(travel_method, access_level)
+            self._views[key] = view
+
+        return view
+
+    # Makes sure the dictionary form exists and drops the cached CSR form,
+    # views and oracle tables, must be called before adding nodes or edges
+    # (destroy updates them in place instead)
+    def _invalidate(self):
+        self.thaw()
+        self._csr = None
+        self._views = {}
+        if self.oracle is not None:
+            self.oracle.clear()
+
+    # Prepares the repair of the oracle tables before destroying nodes and/or edges
+    def _prepare_destruction(self, removed_nodes: list = (), removed_edges: list = ()):
+        if self.oracle is None:
+            return None
+        return self.oracle.prepare_update(removed_nodes, removed_edges)
+
+    # Repairs the oracle tables after destroying nodes and/or edges and keeps
+    # track of the nodes whose heuristic values must be updated
+    # Returns the names of the damaged nodes (None if unknown, i.e. all of them)
+    def _apply_destruction(self, plan, removed_nodes: list = ()):
+        if self.oracle is None:
+            # Without cached distances any node may be damaged
+            self.damaged_nodes = None
+            return None
+
+        damaged = self.oracle.apply_update(plan, removed_nodes)
+        damaged = {self.id_nodes[node_id].name for node_id in damaged}
+        if self.damaged_nodes is not None:
+            self.damaged_nodes |= damaged
+        return damaged
+
+    # Returns the names of the nodes damaged since the last call
+    # (None if unknown, i.e. all of them)
+    def pop_damaged_nodes(self):
+        damaged_nodes = self.damaged_nodes
+        self.damaged_nodes = set()
+        return damaged_nodes
+
+    # Answers the distance queries with an all-pairs distance oracle
+    # (see DistanceOracle for the available methods)
+    def use_distance_oracle(self, method: str = "auto"):
+        self.oracle = DistanceOracle(self, method)
+        return self.oracle
+
+    # Saves a versioned binary snapshot of the graph (see graph.binary) with the
+    # node table, the CSR adjacency with the edge attributes, the nodes data and
+    # the destruction conditions. Optionally saves the distance tables computed
+    # by the oracle and the heuristic values as well
+    def save(self, path: str, distances: bool = False, heuristic: bool = False) -> None:
+        nodes = [node for node in self.id_nodes if node is not None]
+        integer_fuel = all(isinstance(node.fuel, int) for node in nodes)
+
+        sections = {
+            "node_names": "\0".join(
+                node.name if node is not None else "" for node in self.id_nodes
+            ).encode(),
+            "node_alive": bytearray(node is not None for node in self.id_nodes),
+            "node_fuel": array('q' if integer_fuel else 'd', (
+                node.fuel if node is not None else 0 for node in self.id_nodes
+            )),
+            "edge_alive": self.edge_alive,
+        }
+        # The edges removed in place aren't saved
+        csr = self.csr.compact() if self.csr.live_edges else self.csr
+        sections.update({"csr_" + name: buffer for name, buffer in csr.get_buffers().items()})
+
+        metadata = {
+            "directed": self.directed,
+            "travel_method_names": self.csr.travel_method_names,
+            "catastrophes": [
+                [node.name, node.catastrophe.time, node.catastrophe.supplies_demand]
+                for node in nodes if node.catastrophe is not None
+            ],
+            "fleet": [
+                [node.name, [[vehicle.name, vehicle.category] for vehicle in node.vehicles]]
+                for node in nodes if node.vehicles
+            ],
+            "supplies": [
+                [node.name, [
+                    [supply.kind, supply.amount, supply.perishable_time]
+                    for supply in node.supplies.values()
+                ]]
+                for node in nodes if node.supplies
+            ],
+            "destructive_nodes": list(self.destructive_nodes.items()),
+            "destructive_edges": [
+                [node1, node2, time] for (node1, node2), time in self.destructive_edges.items()
+            ],
+            "oracle": None,
+            "heuristic": None
+        }
+
+        if distances and self.oracle is not None:
+            metadata["oracle"] = {"method": self.oracle.method, "tables": []}
+            for i, (key, table) in enumerate(self.oracle.tables.items()):
+                metadata["oracle"]["tables"].append({
+                    "key": key,
+                    "num_nodes": table.num_nodes,
+                    "integer_distances": table.integer_distances
+                })
+                for name, buffer in table.get_arrays().items():
+                    sections[f"distances_{i}_{name}"] = buffer
+
+        if heuristic and self.h:
+            # One column per (catastrophe, vehicle category) pair
+            labels = list(dict.fromkeys(
+                (catastrophe, category)
+                for values in self.h.values()
+                for catastrophe, categories in values.items()
+                for category in categories.keys()
+            ))
+            columns = {label: i for i, label in enumerate(labels)}
+
+            values = np.full((len(self.id_nodes), len(labels)), np.nan)
+            integer_values = True
+            for name, node_values in self.h.items():
+                node_id = self.node_ids[name]
+                for catastrophe, categories in node_values.items():
+                    for category, value in categories.items():
+                        values[node_id, columns[(catastrophe, category)]] = value
+                        integer_values &= isinstance(value, int) or value == float('inf')
+
+            metadata["heuristic"] = {
+                "function": self.heuristic[0].__name__ if self.heuristic is not None else None,
+                "labels": labels,
+                "integer_values": integer_values
+            }
+            sections["heuristic"] = values
+
+        write_binary(path, metadata, sections)
+
+    # Loads a graph from a binary snapshot saved with Graph.save.
+    # The file is memory-mapped: the CSR adjacency and the distance tables are
+    # used in place (shared by every process loading the file) and the graph
+    # is left frozen, so only the nodes are built as python objects
+    @classmethod
+    def load(cls, path: str) -> 'Graph':
+        metadata, sections = read_binary(path)
+
+        graph = cls(metadata["directed"])
+
+        # Nodes
+        names = bytes(sections["node_names"]).decode().split("\0")
+        graph.id_nodes = [
+            Node(name, fuel, None, [], {}) if alive else None
+            for name, fuel, alive in zip(names, sections["node_fuel"], sections["node_alive"])
+        ]
+        graph.node_ids = {
+            node.name: node_id for node_id, node in enumerate(graph.id_nodes) if node is not None
+        }
+        graph.node_index = {node.name: node for node in graph.id_nodes if node is not None}
+
+        # Nodes data
+        for name, time, supplies_demand in metadata["catastrophes"]:
+            graph.node_index[name].catastrophe = Catastrophe(time, supplies_demand)
+        for name, vehicles in metadata["fleet"]:
+            graph.node_index[name].vehicles = [Vehicle(*vehicle) for vehicle in vehicles]
+        for name, supplies in metadata["supplies"]:
+            graph.node_index[name].supplies = {supply[0]: Supply(*supply) for supply in supplies}
+
+        graph.destructive_nodes = dict(metadata["destructive_nodes"])
+        graph.destructive_edges = {
+            (node1, node2): time for node1, node2, time in metadata["destructive_edges"]
+        }
+
+        # Edges, in the frozen CSR form
+        graph.edge_alive = bytearray(sections["edge_alive"])
+        graph._csr = CSRGraph.from_buffers({
+            name: sections["csr_" + name] for name in CSRGraph().get_buffers().keys()
+        }, metadata["travel_method_names"])
+        graph._adjacency = None
+        graph._incoming = None
+        graph._edge_index = None
+
+        # Distance tables, shared with the file until they are repaired
+        if metadata["oracle"] is not None:
+            graph.use_distance_oracle(metadata["oracle"]["method"])
+            for i, table in enumerate(metadata["oracle"]["tables"]):
+                prefix = f"distances_{i}_"
+                key = tuple(table["key"]) if table["key"] is not None else None
+                graph.oracle.tables[key] = DistanceTable.from_arrays(
+                    table["num_nodes"], table["integer_distances"], {
+                        name[len(prefix):]: section
+                        for name, section in sections.items() if name.startswith(prefix)
+                    }
+                )
+            graph.oracle._shared = True
+
+        # Heuristic values
+        if metadata["heuristic"] is not None:
+            labels = metadata["heuristic"]["labels"]
+            integer_values = metadata["heuristic"]["integer_values"]
+            values = np.asarray(sections["heuristic"]).reshape(len(graph.id_nodes), len(labels))
+
+            for node_id, node in enumerate(graph.id_nodes):
+                if node is None:
+                    continue
+
+                node_values = {}
+                for (catastrophe, category), value in zip(labels, values[node_id].tolist()):
+                    if value != value:  # NaN: no value
+                        continue
+                    if integer_values and value != float('inf'):
+                        value = int(value)
+                    node_values.setdefault(catastrophe, {})[category] = value
+                graph.h[node.name] = node_values
+
+            # Restore the heuristic function with the loaded catastrophes and vehicles
+            heuristic_fn = getattr(heurisitics, metadata["heuristic"]["function"] or "", None)
+            if heuristic_fn is not None:
+                graph.heuristic = (heuristic_fn, {
+                    "graph": graph,
+                    "catastrophes": {
+                        name: graph.node_index[name].catastrophe
+                        for name, _, _ in metadata["catastrophes"]
+                    },
+                    "vehicles": [
+                        vehicle
+                        for name, _ in metadata["fleet"]
+                        for vehicle in graph.node_index[name].vehicles
+                    ]
+                })
+
+        return graph
 
     def print_edges(self):
         printed_edges = set()
         for node1, adj_nodes in self.graph.items():
-            for (node2, (distance, speed_mult, travel_method, access_level)) in adj_nodes:
+            for (node2, (distance, speed_mult, travel_method, access_level)) in adj_nodes.values():
 
                 access_level_str = convert_access_level_to_str(access_level)
 
@@ -85,94 +483,259 @@ class Graph:
     def serialize_nodes(self):
         return [node.serialize() for node in self.nodes]
 
+    # Edges of undirected graphs are counted once (they share the id)
     def get_num_edges(self):
-        edges = sum([len(adj_nodes) for adj_nodes in self.graph.values()])
-        return edges if self.directed else edges // 2
+        return self.edge_alive.count(1)
+
+    # Returns the node object given its name (or the node itself)
+    # Returns None if the node is not in the graph
+    def get_node(self, node):
+        if isinstance(node, Node):
+            node = node.name
+        return self.node_index.get(node, None)
+
+    # Returns the integer id of a node given its name (or the node itself)
+    # Returns None if the node is not in the graph
+    def get_node_id(self, node):
+        if isinstance(node, Node):
+            node = node.name
+        return self.node_ids.get(node, None)
 
     def add_node(self, node, fuel, catastrophe, vehicles, supplies):
         if isinstance(node, str):
             node = Node(node, fuel, catastrophe, vehicles, supplies)
 
-        self.nodes.append(node)
-        self.graph[node] = self.graph.get(node, [])
+        self.add_nodes([node])
+
+    # Adds several nodes at once, invalidating the cached forms only once.
+    # Nodes are given as Node objects or (name, fuel, catastrophe, vehicles, supplies) tuples
+    def add_nodes(self, nodes):
+        self._invalidate()
+
+        adjacency = self._adjacency
+        for node in nodes:
+            if not isinstance(node, Node):
+                node = Node(*node)
+
+            # Replace the node if a node with the same name was already added
+            if node.name in self.node_ids:
+                self.id_nodes[self.node_ids[node.name]] = node
+            else:
+                self.node_ids[node.name] = len(self.id_nodes)
+                self.id_nodes.append(node)
+
+            self.node_index[node.name] = node
+            adjacency[node] = adjacency.get(node, {})
+            if self.directed:
+                self._incoming[node] = self._incoming.get(node, {})
 
     def add_edge(self, node1, node2, distance, speed_mult, travel_method, access_level):
-        if isinstance(node1, str):
-            node1 = next((n for n in self.nodes if n.name == node1), None)
+        self.add_edges([(node1, node2, distance, speed_mult, travel_method, access_level)])
+
+    # Adds several edges at once, invalidating the cached forms only once.
+    # Edges are given as (node1, node2, distance, speed_mult, travel_method, access_level) tuples
+    def add_edges(self, edges):
+        self._invalidate()
+
+        adjacency = self._adjacency
+        for node1, node2, distance, speed_mult, travel_method, access_level in edges:
+            node1 = self.get_node(node1)
+            node2 = self.get_node(node2)
+
+            if node1 is None or node2 is None:
+                raise ValueError("Node not previously added to the graph")
+
+            if (node1.name, node2.name, travel_method) in self.edge_index:
+                raise ValueError(
+                    f"Edge ({node1.name}, {node2.name}) with travel method "
+                    f"{travel_method} already added to the graph"
+                )
+
+            edge_id = len(self.edge_alive)
+            self.edge_alive.append(1)
+            self.edge_index[(node1.name, node2.name, travel_method)] = edge_id
+
+            # Add the edge to the graph
+            edge_info = (distance, speed_mult, travel_method, access_level)
+            adjacency[node1][edge_id] = (node2, edge_info)
+
+            # if the graph is undirected, add the edge in the other direction
+            if not self.directed:
+                self.edge_index[(node2.name, node1.name, travel_method)] = edge_id
+                adjacency[node2][edge_id] = (node1, edge_info)
+            else:
+                self._incoming[node2][edge_id] = node1
+
+    # Returns the id of the edge from node1 to node2 with the given travel method,
+    # or of the first edge from node1 to node2 if the travel method is None.
+    # Returns None if there isn't such edge
+    def get_edge_id(self, node1, node2, travel_method: str = None):
+        node1 = self.get_node(node1)
+        node2 = self.get_node(node2)
 
-        if isinstance(node2, str):
-            node2 = next((n for n in self.nodes if n.name == node2), None)
+        if node1 is None or node2 is None:
+            return None
+
+        if travel_method is not None:
+            return self.edge_index.get((node1.name, node2.name, travel_method), None)
 
-        if node1 not in self.nodes or node2 not in self.nodes:
-            raise ValueError("Node not previously added to the graph")
+        return next((
+            edge_id
+            for edge_id, (adjacent, _) in self.graph[node1].items()
+            if adjacent == node2
+        ), None)
 
-        # Add the edge to the graph
-        edge_info = (distance, speed_mult, travel_method, access_level)
-        self.graph[node1].append((node2, edge_info))
+    # Removes the edge from the adjacency and the edge index, leaving a tombstone
+    def _remove_edge(self, node1, edge_id: int) -> None:
+        node2, (_, _, travel_method, _) = self.graph[node1].pop(edge_id)
+        self.edge_alive[edge_id] = 0
+        self.edge_index.pop((node1.name, node2.name, travel_method), None)
 
-        # if the graph is undirected, add the edge in the other direction
         if not self.directed:
-            self.graph[node2].append((node1, edge_info))
+            self.edge_index.pop((node2.name, node1.name, travel_method), None)
+            self.graph[node2].pop(edge_id, None)
+        else:
+            self._incoming[node2].pop(edge_id, None)
 
-    def destroy_node(self, node):
-        # Get the node object if it's a string
-        if isinstance(node, str):
-            node = next((n for n in self.nodes if n.name == node), None)
+    # Removes the node and every edge that contains it, leaving a tombstone
+    def _remove_node(self, node) -> None:
+        for edge_id in list(self.graph[node]):
+            self._remove_edge(node, edge_id)
 
-        if node is None:
-            return
+        if self.directed:
+            for edge_id, source in list(self._incoming[node].items()):
+                self._remove_edge(source, edge_id)
+            del self._incoming[node]
 
-        # Remove the node from the list of nodes
-        self.nodes.remove(node)
-        # Remove all edges that contain the node
         del self.graph[node]
+        self.id_nodes[self.node_ids.pop(node.name)] = None
+        del self.node_index[node.name]
+
+    # Destroys several nodes and edges at once, repairing the oracle tables
+    # and removing the edges from the CSR form and the views in place, in
+    # time proportional to the degree of the nodes whose adjacency changes.
+    # Edges are given as (node1, node2) or (node1, node2, travel_method) tuples,
+    # (node1, node2) destroys the first edge from node1 to node2.
+    # Nodes and edges not in the graph are ignored
+    # Each destruction increments the version of the graph and is recorded with:
+    # - affected_nodes: the destroyed nodes, their neighbors and the nodes of the
+    #   destroyed edges (the nodes whose adjacency changed)
+    # - damaged_nodes: the nodes whose distances (and heuristic values) may have
+    #   changed (None if unknown, i.e. all of them)
+    def destroy(self, nodes: list = (), edges: list = ()):
+        # Get the node objects of the nodes to be destroyed
+        removed_nodes = {}
+        for node in nodes:
+            node = self.get_node(node)
+            if node is not None:
+                removed_nodes[node.name] = node
+
+        # Find the edges to be removed (the edges of the destroyed nodes
+        # are removed with them)
+        removed_edges = {}
+        for node1, node2, *travel_method in edges:
+            node1 = self.get_node(node1)
+            node2 = self.get_node(node2)
+
+            if node1 is None or node2 is None:
+                continue
+            if node1.name in removed_nodes or node2.name in removed_nodes:
+                continue
 
-    def destroy_edges(self, node1, node2):
-        if isinstance(node1, str):
-            node1 = next((n for n in self.nodes if n.name == node1), None)
+            if travel_method:
+                edge_id = self.edge_index.get((node1.name, node2.name, travel_method[0]), None)
+            else:
+                edge_id = next((
+                    edge_id
+                    for edge_id, (adjacent, _) in self.graph[node1].items()
+                    if adjacent == node2 and edge_id not in removed_edges
+                ), None)
 
-        if isinstance(node2, str):
-            node2 = next((n for n in self.nodes if n.name == node2), None)
+            if edge_id is not None:
+                removed_edges[edge_id] = node1
 
-        if node1 is None or node2 is None:
+        if not removed_nodes and not removed_edges:
             return
 
-        a = self.graph[node1]
-        for (node1, edge_info) in a:
-            if node1 == node2:
-                a.remove((node1, edge_info))
-                return
+        # Edges in the format used by the oracle, in both directions if undirected
+        oracle_edges = []
+        for edge_id, node1 in removed_edges.items():
+            node2, edge_info = self.graph[node1][edge_id]
+            oracle_edges.append((self.node_ids[node1.name], self.node_ids[node2.name], edge_info))
+            if not self.directed:
+                oracle_edges.append((self.node_ids[node2.name], self.node_ids[node1.name], edge_info))
+
+        # Nodes whose adjacency changes
+        affected_nodes = set(removed_nodes.keys())
+        for edge_id, node1 in removed_edges.items():
+            affected_nodes.add(node1.name)
+            affected_nodes.add(self.graph[node1][edge_id][0].name)
+        for node in removed_nodes.values():
+            affected_nodes.update(adjacent.name for adjacent, _ in self.graph[node].values())
+            if self.directed:
+                affected_nodes.update(source.name for source in self._incoming[node].values())
+
+        node_ids = [self.node_ids[name] for name in removed_nodes]
+        affected_ids = [self.node_ids[name] for name in affected_nodes]
+        plan = self._prepare_destruction(node_ids, oracle_edges)
+
+        for edge_id, node1 in removed_edges.items():
+            self._remove_edge(node1, edge_id)
+        for node in removed_nodes.values():
+            self._remove_node(node)
+
+        # Remove the edges (cleared in edge_alive) from the CSR form and the views
+        if self._csr is not None:
+            self._csr.remove_dead_edges(affected_ids, self.edge_alive)
+        for view in self._views.values():
+            view.remove_dead_edges(affected_ids, self.edge_alive)
+
+        damaged_nodes = self._apply_destruction(plan, node_ids)
+
+        self.version += 1
+        self.destructions.append((affected_nodes, damaged_nodes))
+
+        # The destroyed nodes have no heuristic values anymore
+        for name in removed_nodes:
+            self.h.pop(name, None)
+            if self.damaged_nodes is not None:
+                self.damaged_nodes.discard(name)
 
-        # if the graph is undirected, remove the edge in the other direction
-        if not self.directed:
-            a = self.graph[node2]
-            for (node2, edge_info) in a:
-                if node2 == node1:
-                    a.remove((node2, edge_info))
-                    return
+    def destroy_node(self, node):
+        self.destroy(nodes=[node])
+
+    def destroy_edges(self, node1, node2, travel_method: str = None):
+        if travel_method is None:
+            self.destroy(edges=[(node1, node2)])
+        else:
+            self.destroy(edges=[(node1, node2, travel_method)])
 
     # Calculates the shortest distance from node1 to node2
-    # without considering the vehicle's travel method and access level.
+    # considering the vehicle's travel method and access level.
     # Uses Dijkstra's algorithm with a priority queue.
     # Returns None if the nodes are not in the graph or if there isn't any path
     def get_distance(self, node1, node2, vehicle):
-        if isinstance(node1, str):
-            node1 = next((n for n in self.nodes if n.name == node1), None)
-
-        if isinstance(node2, str):
-            node2 = next((n for n in self.nodes if n.name == node2), None)
+        node1 = self.get_node(node1)
+        node2 = self.get_node(node2)
 
         if node1 is None or node2 is None:
             return None
 
-        # Priority queue for Dijkstra's algorithm
-        priority_queue = [(0, node1)]  # (current_distance, current_node)
-        distances = {node: float('inf') for node in self.nodes}
-        distances[node1] = 0
+        if self.oracle is not None:
+            return self.oracle.get_distance(node1, node2, vehicle)
+
+        # Iterate the edges the vehicle can travel through
+        view = self.get_view(vehicle)
+        targets = view.targets
+        edge_distances = view.distances
 
-        # Dictionary to track the predecessor of each node
-        # Uncomment predecessors lines to print the path
-        # predecessors = {node: None for node in self.nodes}
+        source = self.node_ids[node1.name]
+        destination = self.node_ids[node2.name]
+
+        # Priority queue for Dijkstra's algorithm
+        priority_queue = [(0, source)]  # (current_distance, current_node_id)
+        distances = [float('inf')] * len(self.id_nodes)
+        distances[source] = 0
 
         # Set to track visited nodes
         visited = set()
@@ -187,45 +750,66 @@ class Graph:
             visited.add(current_node)
 
             # If the current node is the destination, return the distance
-            if current_node == node2:
-                # path = []
-                # while current_node:
-                #     path.append(current_node.name)
-                #     current_node = predecessors[current_node]
-                # path.reverse()  # Reverse to get the path from start to end
-                # print(f"Path found: {' -> '.join(path)}")
+            if current_node == destination:
                 return current_distance
 
             # Skip processing if this is not the shortest path to current_node
             if current_distance > distances[current_node]:
                 continue
 
-            neighbors = self.graph[current_node]
-            for neighbor, (distance, _, edge_travel_method, edge_access_level) in neighbors:
-
-                # Check if the vehicle can travel through the edge
-                if not vehicle.is_travel_possible(edge_travel_method, edge_access_level):
-                    continue
+            for edge in view.edges(current_node):
 
                 # Calculate the potential new distance
-                new_distance = current_distance + distance
+                new_distance = current_distance + edge_distances[edge]
 
                 # Update shortest distance if a better path is found
-                if distance < distances[neighbor]:
+                # NOTE the distance of the path is compared, not the distance of
+                # the edge (which made the baseline relaxation return longer paths)
+                neighbor = targets[edge]
+                if new_distance < distances[neighbor]:
                     distances[neighbor] = new_distance
-                    # predecessors[neighbor] = current_node
                     heappush(priority_queue, (new_distance, neighbor))
 
-        # print(f"No path found from {node1.name} to {node2.name}.")
         # If we finish the loop without finding node2, return infinity
         return float('inf')
 
+    # Calculates the shortest distance from every node to the given node
+    # considering the vehicle's travel method and access level.
+    # Uses a single Dijkstra's algorithm run over the reversed edges.
+    # Returns a list indexed by the node ids with infinity for the nodes
+    # without any path, or None if the node is not in the graph
+    def get_distances_to(self, node, vehicle):
+        node = self.get_node(node)
+
+        if node is None:
+            return None
+
+        if self.oracle is not None:
+            return self.oracle.get_distances_to(node, vehicle)
+
+        # Iterate the reversed edges the vehicle can travel through
+        view = self.get_view(vehicle, reverse=True)
+        return view.shortest_distances(self.node_ids[node.name])
+
+    # Calculates the shortest distance from the given node to every node
+    # considering the vehicle's travel method and access level.
+    # Returns a list indexed by the node ids with infinity for the nodes
+    # without any path, or None if the node is not in the graph
+    def get_distances_from(self, node, vehicle):
+        node = self.get_node(node)
+
+        if node is None:
+            return None
+
+        view = self.get_view(vehicle)
+        return view.shortest_distances(self.node_ids[node.name])
+
     def draw_matplotlib(self):
         # Create list of nodes
         g = nx.DiGraph()
         for node in self.nodes:
             g.add_node(node.name)
-            for (adjacent, (distance, _, _, _)) in self.graph[node]:
+            for (adjacent, (distance, _, _, _)) in self.graph[node].values():
                 g.add_edge(node.name, adjacent.name, distance=distance)
                 if not self.directed:
                     g.add_edge(adjacent.name, node.name, distance=distance)
@@ -262,7 +846,7 @@ class Graph:
             else:
                 dot.node(node.name, color='red')
 
-            for adjacent, (distance, _, travel_method, access_level) in self.graph[node]:
+            for adjacent, (distance, _, travel_method, access_level) in self.graph[node].values():
                 # Define edge color based on travel method
                 color = "black"
                 match travel_method:
@@ -283,3 +867,53 @@ class Graph:
 
         # Render the graph to a file and display it
         dot.render('/tmp/graph', view=True)
+
+
+# The GraphSnapshot class is an isolated copy-on-write view of a graph.
+# Reads are delegated to the base graph, while the nodes that are going to be
+# modified are copied on demand (with their catastrophe) into the snapshot,
+# so the searches only pay for the state they actually mutate.
+# It holds the following attributes:
+# - base: graph the snapshot was taken from
+# - overlay: dictionary to map the node names to the copied nodes
+
+class GraphSnapshot:
+    def __init__(self, base: Graph):
+        self.base = base
+        self.overlay = {}
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def __str__(self):
+        return str(self.base)
+
+    def __repr__(self):
+        return str(self)
+
+    def snapshot(self):
+        snapshot = GraphSnapshot(self.base)
+        snapshot.overlay = self.overlay.copy()
+        return snapshot
+
+    # Returns the node of the snapshot (copied if it was modified)
+    def get_node(self, node):
+        node = self.base.get_node(node)
+        if node is None:
+            return None
+        return self.overlay.get(node.name, node)
+
+    # Returns a copy of the node (and its catastrophe) owned by the snapshot,
+    # that can be modified without changing the base graph
+    def mutable_node(self, node):
+        node = self.base.get_node(node)
+        if node is None:
+            return None
+
+        if node.name not in self.overlay:
+            node = copy.copy(node)
+            if node.catastrophe is not None:
+                node.catastrophe = node.catastrophe.copy()
+            self.overlay[node.name] = node
+
+        return self.overlay[node.name]
@@ -17,45 +17,108 @@
 """
 
 
+# Distance from every node to each catastrophe for each vehicle category.
+# Runs a single backward Dijkstra per (catastrophe, capability class) and
+# shares the resulting column, indexed by node id, between the categories.
+def distances_to_catastrophes(graph, catastrophes: dict, vehicles: list) -> dict:
+    distances = {}
+
+    for catastrophe_node in catastrophes.keys():
+        distances[catastrophe_node] = {}
+        class_distances = {}
+
+        for vehicle in vehicles:
+            capability_class = vehicle.get_capability_class()
+            if capability_class not in class_distances:
+                column = graph.get_distances_to(catastrophe_node, vehicle)
+                # Catastrophe nodes not in the graph (destroyed) can't be reached
+                if column is None:
+                    column = [float('inf')] * len(graph.id_nodes)
+                class_distances[capability_class] = column
+
+            distances[catastrophe_node][vehicle.category] = class_distances[capability_class]
+
+    return distances
+
+
+# Returns a function giving the distance from a node to a catastrophe for a vehicle.
+# Whole columns are computed when updating every node, otherwise the distances
+# are queried one by one (answered from the cached tables if the graph has an oracle).
+def get_distance_fn(graph, catastrophes: dict, vehicles: list, nodes: list = None):
+    if nodes is None:
+        distances = distances_to_catastrophes(graph, catastrophes, vehicles)
+        return lambda node, catastrophe_node, vehicle: \
+            distances[catastrophe_node][vehicle.category][graph.node_ids[node.name]]
+
+    def get_distance(node, catastrophe_node, vehicle):
+        distance = graph.get_distance(node, catastrophe_node, vehicle)
+        return distance if distance is not None else float('inf')
+
+    return get_distance
+
+
+# Updates the heuristic values of the given nodes (all if None) with the
+# heuristic function last used to build the graph heuristic values.
+# Used after destroying nodes or edges with graph.pop_damaged_nodes()
+def update_heuristic(graph, node_names: set = None) -> None:
+    if graph.heuristic is None:
+        return
+
+    heuristic_fn, params = graph.heuristic
+
+    if node_names is None:
+        heuristic_fn(params)
+        return
+
+    nodes = [graph.get_node(name) for name in sorted(node_names)]
+    heuristic_fn(params, [node for node in nodes if node is not None])
+
+
 # Simple heuristic:
 # Distance between the node and each catastrophe for each vehicle.
-def heuristic_fn1(params: dict) -> None:
+def heuristic_fn1(params: dict, nodes: list = None) -> None:
     # Get the parameters
     graph        = params['graph']
     catastrophes = params['catastrophes']
     vehicles     = params['vehicles']
 
-    # Update heuristic values for each node in the graph
-    for node in graph.nodes:
+    get_distance = get_distance_fn(graph, catastrophes, vehicles, nodes)
+
+    # Update heuristic values for each node in the graph (or the given nodes)
+    for node in (graph.nodes if nodes is None else nodes):
         heuristic_value = {}
 
         for catastrophe_node in catastrophes.keys():
             heuristic_value[catastrophe_node] = {}
 
             for vehicle in vehicles:
-                distance = graph.get_distance(node, catastrophe_node, vehicle)
+                distance = get_distance(node, catastrophe_node, vehicle)
 
                 heuristic_value[catastrophe_node][vehicle.category] = distance
 
         graph.h[node.name] = heuristic_value
 
+    graph.heuristic = (heuristic_fn1, params)
+
 
 # Medium heuristic:
 # For each vehicle: distance + time_arrival_vehicle - time_response_catastrophe + fuel
-def heuristic_fn2(params: dict) -> None:
+def heuristic_fn2(params: dict, nodes: list = None) -> None:
     # Get the parameters
     graph        = params['graph']
     catastrophes = params['catastrophes']
     vehicles     = params['vehicles']
 
-    for node in graph.nodes:
+    get_distance = get_distance_fn(graph, catastrophes, vehicles, nodes)
+
+    for node in (graph.nodes if nodes is None else nodes):
         heuristic_value = {}
 
         for catastrophe_node, catastrophe in catastrophes.items():
             heuristic_value[catastrophe_node] = {}
 
             for vehicle in vehicles:
-                distance = graph.get_distance(node, catastrophe_node, vehicle)
+                distance = get_distance(node, catastrophe_node, vehicle)
                 vehicle_time = (distance / vehicle.speed) * 60 - catastrophe.time
                 vehicle_fuel = distance * vehicle.fuel_consumption / 100
 
@@ -64,23 +127,27 @@ def heuristic_fn2(params: dict) -> None:
 
         graph.h[node.name] = heuristic_value
 
+    graph.heuristic = (heuristic_fn2, params)
+
 
 # Complex heuristic:
 # For each vehicle : distance + time_arrival_vehicle - time_response_catastrophe + fuel + cargo
-def heuristic_fn3(params: dict) -> None:
+def heuristic_fn3(params: dict, nodes: list = None) -> None:
     # Get the parameters
     graph        = params['graph']
     catastrophes = params['catastrophes']
     vehicles     = params['vehicles']
 
-    for node in graph.nodes:
+    get_distance = get_distance_fn(graph, catastrophes, vehicles, nodes)
+
+    for node in (graph.nodes if nodes is None else nodes):
         heuristic_value = {}
 
         for catastrophe_node, catastrophe in catastrophes.items():
             heuristic_value[catastrophe_node] = {}
 
             for vehicle in vehicles:
-                distance = graph.get_distance(node, catastrophe_node, vehicle)
+                distance = get_distance(node, catastrophe_node, vehicle)
                 vehicle_time = (distance / vehicle.speed) * 60 - catastrophe.time
                 vehicle_fuel = distance * vehicle.fuel_consumption / 100
                 cargo = vehicle.cargo_capacity - catastrophe.get_supplies_demand_amount()
@@ -89,3 +156,5 @@ def heuristic_fn3(params: dict) -> None:
                     distance + vehicle_time + vehicle_fuel + cargo
 
         graph.h[node.name] = heuristic_value
+
+    graph.heuristic = (heuristic_fn3, params)
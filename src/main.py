@@ -29,6 +29,7 @@ def display_change_simulation_menu(simulation_option) -> None:
         "1 -> Medium city with 10 nodes\n"
         "2 -> Azores archipelago with 9 nodes\n"
         "3 -> Simulation test\n"
+        "4 -> Load scenario file\n"
         "0 -> Back"
     )
 
@@ -102,6 +103,16 @@ def change_simulation_menu(mission_planner, heuristic_option, simulation_option)
             case 3:
                 simulation_option = 3
                 break
+            case 4:
+                try:
+                    path = input("Enter the scenario file path: ")
+                    mission_planner = simulation_data.init_simulation(path, heuristic_option)
+                except (OSError, ValueError) as e:
+                    print(f"Invalid scenario file: {e}")
+                    continue
+                except (EOFError, KeyboardInterrupt):
+                    continue
+                return mission_planner, path
             case _:
                 print("Invalid option")
 
@@ -197,8 +208,8 @@ def change_heuristic_menu(heuristic_option, mission_planner) -> int:
     return heuristic_option
 
 
-def main(verbose) -> None:
-    simulation_option = 1
+def main(verbose, scenario=None) -> None:
+    simulation_option = scenario if scenario is not None else 1
     heuristic_option  = 1
     mission_planner = simulation_data.init_simulation(simulation_option,
                                                       heuristic_option)
@@ -241,7 +252,9 @@ if __name__ == "__main__":
     arg_parser.add_argument("-v", "--verbose",
                             help="Enable verbose mode",
                             action="store_true")
+    arg_parser.add_argument("-s", "--scenario",
+                            help="Load the simulation from a scenario file")
     args = arg_parser.parse_args()
 
     # Main menu loop
-    main(verbose=args.verbose)
+    main(verbose=args.verbose, scenario=args.scenario)
@@ -6,9 +6,14 @@
 # - catastrophes: dictionary of catastrophes where the key is the node name
 # - fleet:        dictionary of vehicles     where the key is the node name
 # - supplies:     dictionary of supplies     where the key is the node name
+# - search_cache: results of the searches, reused across the plannings (see SearchCache)
 
 from graph.graph import Graph
+from graph.heurisitics import update_heuristic
 from operation   import Operation
+from search_cache import SearchCache
+from assignment  import assign, get_cost_function
+from routing     import RoutePlanner
 from algorithms  import (
     bfs,
     dfs,
@@ -16,13 +21,67 @@ from algorithms  import (
     greedy,
     astar
 )
-import simulation_data
 
 from operation import operation_order
+from algorithms import stats
 
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from math import ceil
+import importlib
 import json
 
 
+# Events of the simulation, (time, order, insertion_order, data) tuples,
+# the events at the same time are handled in this order
+EVENT_ORDER = {
+    "destroy_node": 0,
+    "destroy_edge": 1,
+    "operation":    2,
+    "deadline":     3
+}
+
+
+###
+# Search workers
+###
+
+# Graph of the searches of the worker processes (see MissionPlanner.run_searches)
+worker_graph = None
+
+
+# Initializes a worker process with the graph, sent once to each process
+def init_search_worker(graph: Graph) -> None:
+    global worker_graph
+    worker_graph = graph
+
+
+# Runs the search of the vehicle from the vehicle node to the goals.
+# Returns the results by catastrophe node, the nodes they depend on and the
+# latest time (relative to the start time) they depend on (see SearchCache)
+def run_search(graph: Graph, search_algorithm, vehicle_node: str, vehicle,
+               goals: dict, start_time=0) -> (dict, set, int):
+    dependencies = set()
+    latest_times = []
+    results = search_algorithm.search_goals(graph, vehicle, goals, vehicle_node,
+                                            start_time=start_time, dependencies=dependencies,
+                                            latest_times=latest_times)
+    return results, dependencies, max(latest_times, default=0)
+
+
+# Runs a search task, (algorithm module name, vehicle_node, vehicle, goals, start_time),
+# in a worker process. Returns the results, the dependencies, the latest time
+# and the nodes expanded
+def run_worker_search(task: tuple) -> (dict, set, int, int):
+    algorithm, vehicle_node, vehicle, goals, start_time = task
+    search_algorithm = importlib.import_module(algorithm)
+
+    stats.reset()
+    results, dependencies, latest_time = run_search(worker_graph, search_algorithm, vehicle_node,
+                                                    vehicle, goals, start_time)
+    return results, dependencies, latest_time, stats.reset()["expansions"]
+
+
 class MissionPlanner:
     def __init__(self, graph: Graph, catastrophes: dict,
                  fleet: dict, supplies: dict):
@@ -30,6 +89,7 @@ class MissionPlanner:
         self.catastrophes = catastrophes
         self.fleet = fleet
         self.supplies = supplies
+        self.search_cache = SearchCache(graph)
 
     def __str__(self):
         return (
@@ -94,76 +154,202 @@ class MissionPlanner:
                 return vehicle
         return None
 
+    # Returns the module of the search algorithm, with the functions:
+    # - search:       searches the plan of a vehicle to a catastrophe
+    # - search_goals: searches the plans of a vehicle to several catastrophes
     def get_search_algorithm(self, algorithm: str):
         match algorithm:
             case "bfs":
-                return bfs.search
+                return bfs
             case "dfs":
-                return dfs.search
+                return dfs
             case "ucs":
-                return ucs.search
+                return ucs
             case "greedy":
-                return greedy.search
+                return greedy
             case "astar":
-                return astar.search
+                return astar
             case _:
                 raise ValueError(f"Invalid search algorithm: {algorithm}")
 
     ###
     # Search methods
     ###
-    def build_catastrophe_vehicles(self, search_algorithm, start_time=0):
-        catastrophe_vehicles = {}
-
-        for catastrophe_node, catastrophe in self.catastrophes.items():
-            catastrophe_response_time = catastrophe.time
-
-            # Find the vehicles that can reach the catastrophe
-            for vehicle_node, vehicles in self.fleet.items():
+    # Returns the plans of the vehicles that can reach each catastrophe in time
+    # (Key: Catastrophe node, Value: list of (Vehicle, Operations, Fuel consumption))
+    # With multi_goal the plans of each vehicle to every catastrophe are taken
+    # from a single search (see best_first.search_goals), instead of searching
+    # each vehicle and catastrophe pair.
+    # Equivalent vehicles at the same node are searched once (see Vehicle.get_equivalence_class)
+    # and the results of previous plannings are reused while valid (see SearchCache).
+    # With several workers the searches run in parallel processes (see run_searches)
+    # The vehicles (names) and catastrophes (nodes) searched can be restricted
+    # to the given sets
+    def build_catastrophe_vehicles(self, search_algorithm, start_time=0, multi_goal=False, workers=None,
+                                   vehicles_names: set = None, catastrophes_nodes: set = None):
+        goals = {
+            catastrophe_node: catastrophe.time
+            for catastrophe_node, catastrophe in self.catastrophes.items()
+            if catastrophes_nodes is None or catastrophe_node in catastrophes_nodes
+        }
 
-                for vehicle in vehicles or []:
+        vehicles = [
+            (vehicle_node, vehicle)
+            for vehicle_node, node_vehicles in self.fleet.items()
+            for vehicle in node_vehicles or []
+            if vehicles_names is None or vehicle.name in vehicles_names
+        ]
+
+        if not goals or not vehicles:
+            return {}
+
+        # Group the equivalent vehicles, the first vehicle of each class is searched
+        classes = {}
+        vehicles_classes = []
+        for vehicle_node, vehicle in vehicles:
+            equivalence_class = (vehicle_node, vehicle.get_equivalence_class())
+            if equivalence_class not in classes:
+                classes[equivalence_class] = (vehicle_node, vehicle)
+            vehicles_classes.append(equivalence_class)
+
+        # Each search goes to every catastrophe or to a single one
+        searches_goals = [goals] if multi_goal else [
+            {catastrophe_node: response_time} for catastrophe_node, response_time in goals.items()
+        ]
+
+        # Take the cached results and find the searches to run
+        classes_results = {equivalence_class: {} for equivalence_class in classes.keys()}
+        searches = []
+        for equivalence_class, (vehicle_node, vehicle) in classes.items():
+            for search_goals in searches_goals:
+                key = self.search_cache.get_key(search_algorithm, vehicle_node, vehicle, search_goals)
+
+                cached = self.search_cache.get(key, search_goals, start_time)
+                if cached is None:
+                    searches.append((equivalence_class, key, vehicle_node, vehicle, search_goals))
+                    continue
+
+                vehicle_name, results = cached
+                if vehicle_name != vehicle.name:
+                    results = self.rename_results(results, vehicle.name)
+                classes_results[equivalence_class].update(results)
+
+        # Run the search algorithm, results by catastrophe node for each class
+        searches_results = self.run_searches(
+            search_algorithm,
+            [(vehicle_node, vehicle, search_goals) for _, _, vehicle_node, vehicle, search_goals in searches],
+            start_time, workers
+        )
 
-                    # Run the search algorithm
-                    result = search_algorithm(self.graph, vehicle, catastrophe_response_time,
-                                              vehicle_node, catastrophe_node, start_time=start_time)
+        for search, (results, dependencies, latest_time) in zip(searches, searches_results):
+            equivalence_class, key, _, vehicle, search_goals = search
+            self.search_cache.put(key, search_goals, start_time, vehicle.name, results,
+                                  dependencies, latest_time, search_algorithm.USES_HEURISTIC)
+            classes_results[equivalence_class].update(results)
 
-                    # Check if the vehicle can not reach the catastrophe
-                    if not result:
-                        continue
+        # Results of each vehicle, with its name in the operations
+        vehicles_results = []
+        for (_, vehicle), equivalence_class in zip(vehicles, vehicles_classes):
+            results = classes_results[equivalence_class]
+            if classes[equivalence_class][1] is not vehicle:
+                results = self.rename_results(results, vehicle.name)
+            vehicles_results.append(results)
 
-                    # Unwrap the search algorithm result tuple
-                    operations, fuel_consumption = result
+        catastrophe_vehicles = {}
+        for catastrophe_node in goals.keys():
 
-                    # Add the search algorithm result tuple with the vehicle
-                    if catastrophe_node not in catastrophe_vehicles:
-                        catastrophe_vehicles[catastrophe_node] = []
+            # Find the vehicles that can reach the catastrophe
+            for (_, vehicle), results in zip(vehicles, vehicles_results):
+                result = results.get(catastrophe_node, None)
 
-                    catastrophe_vehicles[catastrophe_node].append(
-                        (vehicle, operations, fuel_consumption)
-                    )
+                # Check if the vehicle can not reach the catastrophe
+                if not result:
+                    continue
 
-        return catastrophe_vehicles
+                # Unwrap the search algorithm result tuple
+                operations, fuel_consumption = result
 
-    def assign_optimal_objectives(self, catastrophe_vehicles, fleet):
-        # store the vehicles lsit operations to resolve the catastrophe
-        vehicles_operations = {}
+                # Add the search algorithm result tuple with the vehicle
+                if catastrophe_node not in catastrophe_vehicles:
+                    catastrophe_vehicles[catastrophe_node] = []
 
-        # sort the catastrophe_vehicles by the lenght of vehicles that can reach the catastrophe
-        sorted_catastrophe_keys = sorted(catastrophe_vehicles.keys(),
-                                         key=lambda k: len(catastrophe_vehicles[k]))
+                catastrophe_vehicles[catastrophe_node].append(
+                    (vehicle, operations, fuel_consumption)
+                )
 
-        # assign the vehicle with the least fuel consumption to each catastrophe
-        for catastrophe_key in sorted_catastrophe_keys:
+        return catastrophe_vehicles
 
-            # Get the list of available vehicles for this catastrophe
-            available_vehicles = catastrophe_vehicles[catastrophe_key]
+    # Runs the searches, (vehicle_node, vehicle, goals) tuples where goals is a
+    # dictionary of response times by catastrophe node, of the search algorithm.
+    # Returns the (results, dependencies, latest_time) of each search, in the same order.
+    # With several workers the searches are spread across a pool of processes,
+    # each process getting a copy of the graph once (see init_search_worker)
+    def run_searches(self, search_algorithm, searches: list, start_time=0, workers=None) -> list:
+        if workers is None or workers <= 1 or len(searches) <= 1:
+            return [
+                run_search(self.graph, search_algorithm, vehicle_node, vehicle, goals, start_time)
+                for vehicle_node, vehicle, goals in searches
+            ]
 
-            # If no vehicles are available, skip this catastrophe
-            if not available_vehicles:
+        tasks = [
+            (search_algorithm.__name__, vehicle_node, vehicle, goals, start_time)
+            for vehicle_node, vehicle, goals in searches
+        ]
+
+        # The results are returned in the order of the tasks, whatever the process that ran them
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_search_worker,
+                                 initargs=(self.graph,)) as executor:
+            outputs = list(executor.map(run_worker_search, tasks, chunksize=chunksize))
+
+        # Count the nodes expanded by the workers
+        searches_results = []
+        for results, dependencies, latest_time, expansions in outputs:
+            stats.expansions += expansions
+            searches_results.append((results, dependencies, latest_time))
+        return searches_results
+
+    # Returns the search results of a vehicle with the operations done by another vehicle
+    def rename_results(self, results: dict, vehicle_name: str) -> dict:
+        renamed_results = {}
+        for catastrophe_node, result in results.items():
+            if result:
+                operations, fuel_consumption = result
+                operations = [op.copy_for_vehicle(vehicle_name) for op in operations]
+                result = (operations, fuel_consumption)
+            renamed_results[catastrophe_node] = result
+        return renamed_results
+
+    # Assigns at most one vehicle to each catastrophe, serving as many catastrophes
+    # as possible with the lowest total cost of the objective (see assignment.py):
+    # - fuel:     fuel consumption of the plans
+    # - time:     arrival time of the vehicles at the catastrophes
+    # - weighted: fuel_weight * fuel + time_weight * arrival time
+    # Returns the vehicle, operations and fuel consumption elected for each catastrophe
+    def assign_optimal_objectives(self, catastrophe_vehicles, fleet, objective="fuel",
+                                  fuel_weight=1.0, time_weight=1.0):
+        cost_function = get_cost_function(objective, fuel_weight, time_weight)
+
+        # Index the catastrophes (rows) and the vehicles (columns) of the candidates
+        catastrophe_keys = list(catastrophe_vehicles.keys())
+        vehicles_columns = {}
+        candidates = []
+        plans = {}
+        for row, catastrophe_key in enumerate(catastrophe_keys):
+            for vehicle, operations, fuel_consumption in catastrophe_vehicles[catastrophe_key]:
+                column = vehicles_columns.setdefault(vehicle.name, len(vehicles_columns))
+                candidates.append((row, column, cost_function(operations, fuel_consumption)))
+                plans[(row, column)] = (vehicle, operations, fuel_consumption)
+
+        assignment = assign(candidates, len(catastrophe_keys), len(vehicles_columns))
+
+        # store the vehicles list operations to resolve the catastrophe
+        vehicles_operations = {}
+        for row, catastrophe_key in enumerate(catastrophe_keys):
+            if row not in assignment:
                 continue
 
-            # Find the vehicle with the least fuel consumption
-            vehicle, operations, fuel_consumption = available_vehicles.pop(0)
+            vehicle, operations, fuel_consumption = plans[(row, assignment[row])]
 
             # Store the vehicle and its operations to resolve the catastrophe
             vehicles_operations[catastrophe_key] = {
@@ -176,34 +362,195 @@ class MissionPlanner:
             vehicle.objective  = catastrophe_key
             vehicle.operations = operations
 
-            # Remove the selected vehicle from all catastrophe options
-            for key, vehicles in catastrophe_vehicles.items():
-                # Update the list for the current catastrophe, removing the selected vehicle
-                catastrophe_vehicles[key] = [v for v in vehicles if v[0].name != vehicle.name]
+        return vehicles_operations
 
-            # Resort the catastrophe keys based on updated vehicle counts
-            sorted_catastrophe_keys = sorted(catastrophe_vehicles.keys(),
-                                             key=lambda k: len(catastrophe_vehicles[k]))
+    # Plans a tour of several catastrophes for each vehicle (see routing.py),
+    # from the plans of the vehicles to the catastrophes (catastrophe_vehicles),
+    # searched for the given vehicles (names) and catastrophes (nodes), all by default.
+    # The tours are improved until the time budget (in seconds) is over or
+    # after max_iterations improvements (see routing.py).
+    # Returns the vehicle, operations and fuel consumption of each catastrophe,
+    # in the same format as assign_optimal_objectives
+    def plan_routes(self, catastrophe_vehicles, search_algorithm, start_time=0, objective="fuel",
+                    time_budget=1.0, vehicles_names: set = None, catastrophes_nodes: set = None,
+                    max_iterations: int = None):
+        # NOTE the vehicles are identified by name (see get_vehicle),
+        # so only the first vehicle with each name gets a tour
+        vehicles = {}
+        for vehicle_node, node_vehicles in self.fleet.items():
+            for vehicle in node_vehicles or []:
+                if vehicles_names is None or vehicle.name in vehicles_names:
+                    vehicles.setdefault(vehicle.name, (vehicle_node, vehicle))
+        catastrophes = {
+            catastrophe_node: catastrophe
+            for catastrophe_node, catastrophe in self.catastrophes.items()
+            if (catastrophes_nodes is None or catastrophe_node in catastrophes_nodes)
+            and not catastrophe.is_resolved()
+        }
 
-        return vehicles_operations
+        # The vehicles not found in catastrophe_vehicles can't reach the catastrophe
+        first_legs = {
+            (vehicle.name, catastrophe_node): None
+            for _, vehicle in vehicles.values()
+            for catastrophe_node in catastrophes.keys()
+        }
+        for catastrophe_node, node_vehicles in catastrophe_vehicles.items():
+            for vehicle, operations, fuel_consumption in node_vehicles:
+                if (vehicle.name, catastrophe_node) in first_legs and vehicles[vehicle.name][1] is vehicle:
+                    first_legs[(vehicle.name, catastrophe_node)] = (operations, fuel_consumption)
+
+        vehicles = list(vehicles.values())
+        route_planner = RoutePlanner(self.graph, search_algorithm, vehicles, catastrophes, first_legs,
+                                     start_time, get_cost_function(objective), time_budget,
+                                     max_iterations)
+        tours = route_planner.plan()
+
+        # store the vehicles list operations to resolve the catastrophes of the tours
+        vehicles_operations = {}
+        for index, tour in enumerate(tours):
+            if not tour:
+                continue
+
+            _, vehicle = vehicles[index]
+            _, legs = route_planner.get_tour_cost(index, tuple(tour))
+            for catastrophe_node, (operations, fuel_consumption, _, _, _) in zip(tour, legs):
+                vehicles_operations[catastrophe_node] = {
+                    "vehicle": vehicle,
+                    "operations": operations,
+                    "fuel_consumption": fuel_consumption
+                }
+
+            # Assign the first objective to the vehicle as well as the operations of the tour
+            vehicle.objective  = tour[0]
+            vehicle.operations = sum((operations for operations, _, _, _, _ in legs), [])
+
+        # Same order as the catastrophes
+        return {
+            catastrophe_node: vehicles_operations[catastrophe_node]
+            for catastrophe_node in self.catastrophes.keys()
+            if catastrophe_node in vehicles_operations
+        }
 
+    # Returns the names of the vehicles whose plans go through the destroyed
+    # nodes or edges from the given time on (the operations not executed yet)
+    def get_affected_vehicles(self, vehicles_operations: dict, nodes: list, edges: list, time) -> set:
+        nodes = set(nodes)
+        edges = set(edges)
+        if not self.graph.directed:
+            edges |= {(node2, node1) for node1, node2 in edges}
+
+        affected_vehicles = set()
+        for plan in vehicles_operations.values():
+            # Node where the vehicle is before each operation
+            node = None
+            for operation in plan["operations"]:
+                if operation.time >= time and (
+                    operation.node in nodes
+                    or operation.operation_type == "move" and (node, operation.node) in edges
+                ):
+                    affected_vehicles.add(plan["vehicle"].name)
+                    break
+                node = operation.node
+
+        return affected_vehicles
+
+    # Replans the vehicles affected by a destruction at the given time, the other
+    # vehicles keep their plans. The affected vehicles are searched to the
+    # catastrophes they leave and to the catastrophes without a vehicle, and the
+    # vehicles without a plan only to the catastrophes left (they couldn't reach
+    # the others before, and destructions don't shorten any path).
+    # Returns the new vehicle elected for each catastrophe and the names of the
+    # vehicles whose plans changed
+    def replan_affected_vehicles(self, search_algorithm, vehicles_operations: dict,
+                                 affected_vehicles: set, time, multi_goal=False,
+                                 workers=None, objective="fuel", routing=False,
+                                 time_budget=1.0, max_iterations=None) -> (dict, set):
+        kept_operations = {}
+        left_catastrophes = set()
+        for catastrophe_node, plan in vehicles_operations.items():
+            if plan["vehicle"].name in affected_vehicles:
+                left_catastrophes.add(catastrophe_node)
+            else:
+                kept_operations[catastrophe_node] = plan
+
+        unassigned_catastrophes = {
+            catastrophe_node
+            for catastrophe_node in self.catastrophes.keys()
+            if catastrophe_node not in vehicles_operations
+        }
+        kept_vehicles = {plan["vehicle"].name for plan in kept_operations.values()}
+        idle_vehicles = {
+            vehicle.name
+            for vehicle in self.get_vehicles_list()
+            if vehicle.name not in affected_vehicles and vehicle.name not in kept_vehicles
+        }
+
+        # The affected vehicles not elected again are left without a plan
+        for vehicle in self.get_vehicles_list():
+            if vehicle.name in affected_vehicles:
+                vehicle.objective  = None
+                vehicle.operations = []
+
+        # With routing the tours of the affected and idle vehicles are planned again
+        if routing:
+            catastrophes_nodes = left_catastrophes | unassigned_catastrophes
+            vehicles_names = affected_vehicles | idle_vehicles
+            catastrophe_vehicles = self.build_catastrophe_vehicles(
+                search_algorithm, time, multi_goal, workers, vehicles_names, catastrophes_nodes
+            )
+            new_operations = self.plan_routes(catastrophe_vehicles, search_algorithm, time, objective,
+                                              time_budget, vehicles_names, catastrophes_nodes,
+                                              max_iterations)
+
+            replanned_vehicles = affected_vehicles | {plan["vehicle"].name for plan in new_operations.values()}
+            return {**kept_operations, **new_operations}, replanned_vehicles
+
+        catastrophe_vehicles = self.build_catastrophe_vehicles(
+            search_algorithm, time, multi_goal, workers,
+            affected_vehicles, left_catastrophes | unassigned_catastrophes
+        )
+        if left_catastrophes and idle_vehicles:
+            idle_catastrophe_vehicles = self.build_catastrophe_vehicles(
+                search_algorithm, time, multi_goal, workers, idle_vehicles, left_catastrophes
+            )
+            for catastrophe_node, vehicles in idle_catastrophe_vehicles.items():
+                catastrophe_vehicles.setdefault(catastrophe_node, []).extend(vehicles)
+
+        new_operations = self.assign_optimal_objectives(catastrophe_vehicles, self.fleet, objective)
+
+        replanned_vehicles = affected_vehicles | {plan["vehicle"].name for plan in new_operations.values()}
+        return {**kept_operations, **new_operations}, replanned_vehicles
+
+    # Plans the mission and runs the simulation, replanning on the destructions.
+    # Returns the operations executed.
+    # With interactive the user is asked to print the operations by vehicle
+    # and the mission planner is restored to the state of the simulation option
     def planner(self,
                 simulation_option: int,
                 heuristic_option: int,
                 algorithm: str,
-                verbose: bool):
+                verbose: bool,
+                multi_goal: bool = False,
+                workers: int = None,
+                objective: str = "fuel",
+                routing: bool = False,
+                time_budget: float = 1.0,
+                max_iterations: int = None,
+                interactive: bool = True) -> list[Operation]:
 
         # Get the search algorithm
         try:
             search_algorithm = self.get_search_algorithm(algorithm)
+            get_cost_function(objective)
         except ValueError as e:
             print(e)
-            return
+            return []
 
         # Define the structure to store the vehicles that
         # can reach the catastrophes in time
         # (Key: Catastrophe node, Value: (Vehicle, Operations, Fuel consumption))
-        catastrophe_vehicles = self.build_catastrophe_vehicles(search_algorithm)
+        catastrophe_vehicles = \
+            self.build_catastrophe_vehicles(search_algorithm, 0, multi_goal, workers)
 
         if verbose:
             # Semi-serialize the catastrophe_vehicles
@@ -222,8 +569,15 @@ class MissionPlanner:
             print("Catastrophe that can be reached in time by the vehicles:")
             print(json.dumps(catastrophe_vehicles_serialized, indent=4))
 
-        # Find the optimal objective for each vehicle
-        vehicles_operations = self.assign_optimal_objectives(catastrophe_vehicles, self.fleet)
+        # Find the optimal objective for each vehicle,
+        # or the tour of catastrophes of each vehicle with routing
+        if routing:
+            vehicles_operations = self.plan_routes(catastrophe_vehicles, search_algorithm, 0,
+                                                   objective, time_budget,
+                                                   max_iterations=max_iterations)
+        else:
+            vehicles_operations = self.assign_optimal_objectives(catastrophe_vehicles, self.fleet,
+                                                                 objective)
 
         if verbose:
             vehicles_operations_serialized = {
@@ -242,61 +596,81 @@ class MissionPlanner:
         operations = sum((v["operations"] for v in vehicles_operations.values()), [])
         operations = sorted(operations, key=lambda x: (x.time, operation_order[x.operation_type]))
 
-        # Execute the operations by time oreder and update the state
+        # Execute the operations by time order and update the state
         # Checks for destructive nodes and edges and updates the graph
+        # The simulation jumps from event to event (see the simulation methods),
+        # nothing changes between them
+        events = self.get_simulation_events()
+        plan = 0
+        self.schedule_operations(events, operations, 0, plan)
+
+        # Plan of each vehicle, the operations of its previous plans are discarded
+        vehicles_plans = {v["vehicle"].name: plan for v in vehicles_operations.values()}
+
         time = 0
         operations_executed = []
         while True:
-            # Check for destructive nodes
-            nodes_to_destroy = [
-                node
-                for node, destruction_time in self.graph.destructive_nodes.items()
-                if destruction_time == time
-            ]
+            # Destructive nodes and edges at this time, in the order they were defined
+            nodes_to_destroy = []
+            edges_to_destroy = []
+            while events and events[0][0] == time and events[0][1] < EVENT_ORDER["operation"]:
+                _, order, _, destruction = heappop(events)
+                if order == EVENT_ORDER["destroy_node"]:
+                    nodes_to_destroy.append(destruction)
+                else:
+                    edges_to_destroy.append(destruction)
 
-            # Destroy the nodes and update the graph
             for node in nodes_to_destroy:
                 print(f"[{str(time).rjust(3)}] Node {node} was destroyed.")
-                self.graph.destroy_node(node)
-
-            # Check for destructive edges
-            edges_to_destroy = [
-                (node1, node2)
-                for (node1, node2), destruction_time in self.graph.destructive_edges.items()
-                if destruction_time == time
-            ]
 
-            # Destroy the edges and update the graph
             for node1, node2 in edges_to_destroy:
                 print(f"[{str(time).rjust(3)}] Edge ({node1}, {node2}) was destroyed.")
-                self.graph.destroy_edges(node1, node2)
 
-            # If the graph was updated, recompute the accessible nodes by the vehicles as well
-            # as the objective catastrophes for each vehicle
-            if nodes_to_destroy or edges_to_destroy:
-                # Rebuild the catastrophe_vehicles
-                catastrophe_vehicles = \
-                    self.build_catastrophe_vehicles(search_algorithm, time)
-
-                # Find the optimal objective for each vehicle
-                vehicles_operations = \
-                    self.assign_optimal_objectives(catastrophe_vehicles, self.fleet)
+            # Destroy the nodes and edges at once and update the graph
+            self.graph.destroy(nodes_to_destroy, edges_to_destroy)
 
-                # Get and sort the operations by time and in case of tie by the operation type order
-                operations = sum((v["operations"] for v in vehicles_operations.values()), [])
-                operations = sorted(operations, key=lambda x: (x.time, operation_order[x.operation_type]))
+            # If the graph was updated, recompute the accessible nodes by the vehicles
+            # whose plans were affected as well as their objective catastrophes,
+            # the other vehicles keep their plans
+            if nodes_to_destroy or edges_to_destroy:
+                # Update the heuristic values of the damaged nodes
+                update_heuristic(self.graph, self.graph.pop_damaged_nodes())
+
+                affected_vehicles = self.get_affected_vehicles(vehicles_operations, nodes_to_destroy,
+                                                               edges_to_destroy, time)
+
+                if affected_vehicles:
+                    # Rebuild the catastrophe_vehicles and find the optimal objective
+                    # for the affected vehicles
+                    vehicles_operations, replanned_vehicles = self.replan_affected_vehicles(
+                        search_algorithm, vehicles_operations, affected_vehicles, time,
+                        multi_goal, workers, objective, routing, time_budget, max_iterations
+                    )
 
-            # Get the operations that should be executed
-            current_operations = [op for op in operations if op.time == time]
+                    # Get and sort the operations by time and in case of tie by the operation type order
+                    operations = sum((
+                        v["operations"] for v in vehicles_operations.values()
+                        if v["vehicle"].name in replanned_vehicles
+                    ), [])
+                    operations = sorted(operations, key=lambda x: (x.time, operation_order[x.operation_type]))
+
+                    # The operations of the previous plans of the vehicles are discarded
+                    plan += 1
+                    for vehicle_name in replanned_vehicles:
+                        vehicles_plans[vehicle_name] = plan
+                    self.schedule_operations(events, operations, time, plan)
+
+            # Execute the operations of this time
+            while events and events[0][0] == time and events[0][1] == EVENT_ORDER["operation"]:
+                _, _, _, (operation_plan, operation) = heappop(events)
+                if operation_plan != vehicles_plans.get(operation.vehicle, None):
+                    continue
 
-            # Execute the operations
-            for operation in current_operations:
                 print(operation)
                 self.execute(operation)
                 operations_executed.append(operation)
-                # TODO
-                # When a vehicle resolves a catastrophe find the next catastrophe to resolve
-                # Repeat until there are no more catastrophes to resolve or the time is over
+                # NOTE with routing, once a vehicle is done with a catastrophe it goes on
+                # to the next catastrophe of its tour (see plan_routes)
 
             # Check if all catastrophes were resolved
             if all(c.is_resolved() for c in self.catastrophes.values()):
@@ -308,8 +682,15 @@ class MissionPlanner:
                 print(f"[{str(time).rjust(3)}] Time to response to all catastrophes is over.")
                 break
 
-            # Increment the time
-            time += 1
+            # Go to the time of the next event (the deadline event is always left)
+            while events[0][0] == time:
+                heappop(events)
+            time = events[0][0]
+
+        # Without interaction the state is left as the simulation ended (e.g. to read
+        # the catastrophes resolved) and the operations executed are returned
+        if not interactive:
+            return operations_executed
 
         # Print the operations executed ordered by vehicle instead of time if the user wants it
         try:
@@ -331,10 +712,57 @@ class MissionPlanner:
                     print(operation)
 
         # Restore mission planner state after running the planner/simulator
+        # NOTE imported here since simulation_data imports this module
+        import simulation_data
         mission_planner = \
             simulation_data.init_simulation(simulation_option, heuristic_option)
         self.__dict__.update(mission_planner.__dict__)
 
+        return operations_executed
+
+    ###
+    # Simulation methods
+    ###
+
+    # The simulation runs minute by minute (integer times), so only the
+    # destructions and operations at integer times ever happen.
+    # The events are kept in a binary heap:
+    # - destroy_node: data is the node name
+    # - destroy_edge: data is the (node1, node2) tuple
+    # - operation:    data is the (plan, operation) tuple, the operations of
+    #                 previous plans of the vehicle are skipped, the insertion
+    #                 order is (plan, index) so the operations of a new plan go
+    #                 after the ones of previous plans at the same time
+    # - deadline:     first time the response times of all catastrophes are over
+
+    # Returns the heap with the destruction and deadline events
+    def get_simulation_events(self) -> list:
+        events = []
+        insertion_order = 0
+
+        for node, destruction_time in self.graph.destructive_nodes.items():
+            if destruction_time >= 0 and destruction_time == int(destruction_time):
+                insertion_order += 1
+                heappush(events, (int(destruction_time), EVENT_ORDER["destroy_node"],
+                                  insertion_order, node))
+
+        for edge, destruction_time in self.graph.destructive_edges.items():
+            if destruction_time >= 0 and destruction_time == int(destruction_time):
+                insertion_order += 1
+                heappush(events, (int(destruction_time), EVENT_ORDER["destroy_edge"],
+                                  insertion_order, edge))
+
+        deadline = max((c.time for c in self.catastrophes.values()), default=0)
+        heappush(events, (max(0, ceil(deadline)), EVENT_ORDER["deadline"], 0, None))
+        return events
+
+    # Adds the events of the operations (sorted) of the plan from the given time
+    def schedule_operations(self, events: list, operations: list, time: int, plan: int) -> None:
+        for index, operation in enumerate(operations):
+            if operation.time >= time and operation.time == int(operation.time):
+                heappush(events, (int(operation.time), EVENT_ORDER["operation"],
+                                  (plan, index), (plan, operation)))
+
     def execute(self, operation: Operation):
         # Get the vehicle from the fleet
         vehicle = self.get_vehicle(operation.vehicle) or None
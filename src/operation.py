@@ -17,6 +17,31 @@ operation_order = {
 }
 
 
+###
+# Operation chains
+###
+
+# The searches keep the operations of each state as a chain of
+# (operation, parent) tuples, where parent is the chain of the previous
+# operations (None for no operations), so the states share their common
+# operations instead of copying them. The list is built only for the
+# path that reaches the goal.
+
+# Returns the chain with the operation appended
+def chain_operation(chain: tuple, operation) -> tuple:
+    return (operation, chain)
+
+
+# Returns the list of operations of the chain, in order
+def chain_to_list(chain: tuple) -> list:
+    operations = []
+    while chain is not None:
+        operation, chain = chain
+        operations.append(operation)
+    operations.reverse()
+    return operations
+
+
 class Operation:
     def __init__(self,
                  time:           int,
@@ -65,3 +90,9 @@ class Operation:
 
     def copy(self):
         return copy.deepcopy(self)
+
+    # Returns a copy of the operation done by another vehicle
+    def copy_for_vehicle(self, vehicle: str):
+        operation = self.copy()
+        operation.vehicle = vehicle
+        return operation
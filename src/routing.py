@@ -0,0 +1,293 @@
+# Multi-trip planning of the vehicles (vehicle routing).
+# Each vehicle serves a tour of catastrophes, one after the other: once it is
+# done with a catastrophe (resolved or its response time is over, see shuttle.py)
+# it goes from the catastrophe node to the next catastrophe of its tour.
+# Each catastrophe is still served by at most one vehicle.
+
+# Each leg of a tour is the plan found by the search algorithm from the node
+# where the vehicle is, at the time it gets there and with the fuel it has left.
+# The legs are searched when first needed and kept for the rest of the planning.
+# The tours are valid if every catastrophe of the tour is reached in time.
+# The cost of a leg is the cost of the plan (see assignment.py) plus a penalty,
+# higher than the total cost of the first legs, if the plan doesn't resolve the catastrophe,
+# so the tours don't trade resolved catastrophes for lower costs (e.g. a small
+# vehicle shuttling until the response time is over).
+
+# The tours are built in three steps:
+# 1. Initial tours: one catastrophe per vehicle, from the minimum cost
+#    assignment of the first legs (see assignment.py)
+# 2. Cheapest insertion: the catastrophes left are inserted, one at a time,
+#    at the position of the tour that adds the lowest cost
+# 3. Local search: the catastrophes are relocated to other positions or tours,
+#    or swapped between tours, while the total cost decreases, inserting the
+#    catastrophes left again after each improvement
+# Steps 1 and 2 always run to the end, so every catastrophe that fits in a
+# tour is served whatever the speed of the machine. Only step 3 stops when the
+# time budget (in seconds) is over or after the maximum number of improvements,
+# so the tours only depend on the speed of the machine through the improvements
+# made (without a time budget, the tours are the same on every machine).
+
+# The times of the operations of the legs are absolute (the time of the
+# operations of a plan found from a start time is relative to that time).
+
+from assignment import assign
+
+import time as clock
+
+
+class RoutePlanner:
+    # - vehicles:        list of (vehicle_node, vehicle)
+    # - catastrophes:    dictionary of catastrophes by node name
+    # - first_legs:      plans already searched from the vehicle nodes, by
+    #                    (vehicle name, catastrophe node), None if not reachable
+    # - cost_function:   cost of a plan, given its operations and fuel consumption
+    # - time_budget:     seconds to improve the tours (None for no time limit)
+    # - max_iterations:  maximum number of improvements (None for no limit)
+    def __init__(self, graph, search_algorithm, vehicles: list, catastrophes: dict,
+                 first_legs: dict, start_time: int, cost_function, time_budget: float = 1.0,
+                 max_iterations: int = None):
+        self.graph = graph
+        self.search_algorithm = search_algorithm
+        self.vehicles = vehicles
+        self.catastrophes = catastrophes
+        self.start_time = start_time
+        self.cost_function = cost_function
+        self.deadline = None if time_budget is None else clock.perf_counter() + time_budget
+        self.max_iterations = max_iterations
+        self.iterations = 0
+
+        # Penalty of the legs that don't resolve their catastrophe
+        self.unresolved_penalty = 1
+
+        # Legs by (vehicle name, from node, catastrophe node, start time, tank)
+        self.legs = {}
+        for vehicle_node, vehicle in vehicles:
+            for catastrophe_node in catastrophes.keys():
+                key = (vehicle.name, vehicle_node, catastrophe_node, start_time, vehicle.tank)
+                if (vehicle.name, catastrophe_node) in first_legs:
+                    result = first_legs[(vehicle.name, catastrophe_node)]
+                    self.legs[key] = self.get_leg_from_result(vehicle, catastrophe_node, result, start_time)
+                    if result:
+                        operations, fuel_consumption = result
+                        self.unresolved_penalty += self.cost_function(operations, fuel_consumption)
+
+        # Cost and legs of the tours, by (vehicle index, tour)
+        self.tours_costs = {}
+
+    # Returns if the improvement of the tours is over
+    def is_over(self) -> bool:
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return self.deadline is not None and clock.perf_counter() >= self.deadline
+
+    ###
+    # Legs and tours
+    ###
+
+    # Returns the leg, (operations, fuel consumption, end time, end tank, resolved),
+    # of a search result (operations, fuel consumption) started at the given time
+    def get_leg_from_result(self, vehicle, catastrophe_node: str, result, start_time: int):
+        if not result:
+            return None
+
+        operations, fuel_consumption = result
+        tank = vehicle.tank
+        end_time = start_time
+        supplied = {}
+        leg_operations = []
+        for operation in operations:
+            if start_time != 0:
+                operation = operation.copy()
+                operation.time += start_time
+
+            tank -= operation.fuel_consumed or 0
+            tank += operation.fuel or 0
+            end_time += operation.duration
+            if operation.operation_type == "drop":
+                for kind, amount in operation.supplies.items():
+                    supplied[kind] = supplied.get(kind, 0) + amount
+            leg_operations.append(operation)
+
+        demand = self.catastrophes[catastrophe_node].supplies_demand
+        resolved = all(supplied.get(kind, 0) >= amount for kind, amount in demand.items())
+        return leg_operations, fuel_consumption, end_time, tank, resolved
+
+    # Returns the leg of the vehicle from the node to the catastrophe,
+    # starting at the given time with the given fuel (None if not reachable)
+    def get_leg(self, vehicle, node: str, catastrophe_node: str, start_time: int, tank: float):
+        key = (vehicle.name, node, catastrophe_node, start_time, tank)
+        if key in self.legs:
+            return self.legs[key]
+
+        # The vehicle carries nothing after the drops of its previous catastrophe
+        leg_vehicle = vehicle.copy()
+        leg_vehicle.tank = tank
+        leg_vehicle.cargo_contents = {}
+
+        goals = {catastrophe_node: self.catastrophes[catastrophe_node].time}
+        results = self.search_algorithm.search_goals(self.graph, leg_vehicle, goals,
+                                                     node, start_time)
+        leg = self.get_leg_from_result(leg_vehicle, catastrophe_node,
+                                       results.get(catastrophe_node, None), start_time)
+        self.legs[key] = leg
+        return leg
+
+    # Returns the cost and the legs of the tour of the vehicle (None if not valid)
+    def get_tour_cost(self, index: int, tour: tuple):
+        key = (index, tour)
+        if key in self.tours_costs:
+            return self.tours_costs[key]
+
+        node, vehicle = self.vehicles[index]
+        start_time = self.start_time
+        tank = vehicle.tank
+
+        cost = 0
+        legs = []
+        result = None
+        for catastrophe_node in tour:
+            leg = self.get_leg(vehicle, node, catastrophe_node, start_time, tank)
+            if leg is None:
+                break
+
+            operations, fuel_consumption, start_time, tank, resolved = leg
+            cost += self.cost_function(operations, fuel_consumption)
+            if not resolved:
+                cost += self.unresolved_penalty
+            legs.append(leg)
+            node = catastrophe_node
+        else:
+            result = (cost, legs)
+
+        self.tours_costs[key] = result
+        return result
+
+    ###
+    # Construction and improvement
+    ###
+
+    # Returns the tour of each vehicle (list of catastrophe nodes)
+    def plan(self) -> list:
+        tours = self.get_initial_tours()
+        unserved = [
+            catastrophe_node
+            for catastrophe_node in sorted(self.catastrophes.keys(),
+                                           key=lambda c: self.catastrophes[c].time)
+            if all(catastrophe_node not in tour for tour in tours)
+        ]
+
+        self.insert_unserved(tours, unserved)
+        while not self.is_over() and (self.relocate(tours) or self.swap(tours)):
+            self.iterations += 1
+            self.insert_unserved(tours, unserved)
+
+        return [list(tour) for tour in tours]
+
+    # Returns the tours with one catastrophe per vehicle, from the minimum cost assignment
+    def get_initial_tours(self) -> list:
+        catastrophe_nodes = list(self.catastrophes.keys())
+        candidates = []
+        for row, catastrophe_node in enumerate(catastrophe_nodes):
+            for column in range(len(self.vehicles)):
+                result = self.get_tour_cost(column, (catastrophe_node,))
+                if result is not None:
+                    candidates.append((row, column, result[0]))
+
+        tours = [() for _ in self.vehicles]
+        for row, column in assign(candidates, len(catastrophe_nodes), len(self.vehicles)).items():
+            tours[column] = (catastrophe_nodes[row],)
+        return tours
+
+    # Inserts the unserved catastrophes (removed from the list) in the tours,
+    # the cheapest insertion first, until none can be inserted
+    def insert_unserved(self, tours: list, unserved: list) -> None:
+        while unserved:
+            best = None
+            for catastrophe_node in unserved:
+                for index, tour in enumerate(tours):
+                    tour_cost = self.get_tour_cost(index, tour)[0]
+                    for position in range(len(tour) + 1):
+                        new_tour = tour[:position] + (catastrophe_node,) + tour[position:]
+                        result = self.get_tour_cost(index, new_tour)
+                        if result is not None and (best is None or result[0] - tour_cost < best[0]):
+                            best = (result[0] - tour_cost, catastrophe_node, index, new_tour)
+
+            if best is None:
+                return
+
+            _, catastrophe_node, index, new_tour = best
+            tours[index] = new_tour
+            unserved.remove(catastrophe_node)
+
+    # Moves a catastrophe to another position or tour if it lowers the total cost.
+    # Returns if the tours were improved
+    def relocate(self, tours: list) -> bool:
+        for index, tour in enumerate(tours):
+            for position, catastrophe_node in enumerate(tour):
+                removed_tour = tour[:position] + tour[position + 1:]
+                removed_cost = self.get_tour_cost(index, removed_tour)
+                if removed_cost is None:
+                    continue
+
+                # Cost saved by removing the catastrophe from the tour
+                saving = self.get_tour_cost(index, tour)[0] - removed_cost[0]
+
+                for other_index, other_tour in enumerate(tours):
+                    if other_index == index:
+                        other_tour = removed_tour
+                    other_cost = self.get_tour_cost(other_index, other_tour)[0]
+
+                    for other_position in range(len(other_tour) + 1):
+                        new_tour = (other_tour[:other_position] + (catastrophe_node,)
+                                    + other_tour[other_position:])
+                        if other_index == index and new_tour == tour:
+                            continue
+
+                        result = self.get_tour_cost(other_index, new_tour)
+                        if result is None:
+                            continue
+
+                        if other_index == index:
+                            improvement = self.get_tour_cost(index, tour)[0] - result[0]
+                        else:
+                            improvement = saving - (result[0] - other_cost)
+
+                        if improvement > 1e-9:
+                            if other_index != index:
+                                tours[index] = removed_tour
+                            tours[other_index] = new_tour
+                            return True
+
+                    if self.is_over():
+                        return False
+        return False
+
+    # Swaps two catastrophes of different tours if it lowers the total cost.
+    # Returns if the tours were improved
+    def swap(self, tours: list) -> bool:
+        for index, tour in enumerate(tours):
+            tour_cost = self.get_tour_cost(index, tour)[0]
+            for other_index in range(index + 1, len(tours)):
+                other_tour = tours[other_index]
+                other_cost = self.get_tour_cost(other_index, other_tour)[0]
+
+                for position in range(len(tour)):
+                    for other_position in range(len(other_tour)):
+                        new_tour = (tour[:position] + (other_tour[other_position],)
+                                    + tour[position + 1:])
+                        new_other_tour = (other_tour[:other_position] + (tour[position],)
+                                          + other_tour[other_position + 1:])
+
+                        result = self.get_tour_cost(index, new_tour)
+                        other_result = self.get_tour_cost(other_index, new_other_tour)
+                        if result is None or other_result is None:
+                            continue
+
+                        if tour_cost + other_cost - result[0] - other_result[0] > 1e-9:
+                            tours[index] = new_tour
+                            tours[other_index] = new_other_tour
+                            return True
+
+                if self.is_over():
+                    return False
+        return False
@@ -0,0 +1,262 @@
+# Scenario files describe a whole simulation (graph, catastrophes, fleet,
+# supplies and destruction conditions) as CSV records, one per line,
+# where the first field is the kind of the record:
+#
+#   graph,<directed|undirected>
+#   node,<name>,<fuel>
+#   edge,<node1>,<node2>,<distance>,<speed_multiplier>,<travel_method>,<access_level>
+#   catastrophe,<node>,<time>,<supply_kind>=<amount>,...
+#   vehicle,<node>,<name>,<category>
+#   supply,<node>,<kind>,<amount>[,<perishable_time>]
+#   destructive_node,<node>,<time>
+#   destructive_edge,<node1>,<node2>,<time>
+#
+# - Empty lines and lines starting with '#' are ignored
+# - Fields can be quoted (e.g. names with commas), spaces after the commas are skipped
+# - The graph record is optional (undirected by default) but must come before the nodes
+# - Edges must come after both of their nodes, the other records can come in any order
+# - Access levels are numbers: 1 (low), 2 (medium) or 3 (high)
+# - Nodes, edges, catastrophes and vehicles keep the order of the file
+#
+# Example (see simulation_data for the built-in scenarios):
+#
+#   graph,undirected
+#   node,A,50
+#   node,B,0
+#   node,Santa Maria,10
+#   edge,A,B,20,1.00,air,2
+#   edge,B,Santa Maria,35,0.70,water,2
+#   catastrophe,B,600,food=300,water=200
+#   vehicle,A,Drone1,drone
+#   vehicle,A,Truck1,truck
+#   supply,A,food,500,600
+#   destructive_node,Santa Maria,300
+#   destructive_edge,A,B,350
+#
+# The file is read as a stream and the consecutive records of the same kind
+# are inserted in bulk into the graph, so loading a scenario never holds more
+# than the resulting objects in memory.
+
+# Scenarios can also be loaded from the binary snapshots saved with Graph.save,
+# which hold the nodes data and the destruction conditions along with the graph.
+# The catastrophes, fleet and supplies follow the order of the nodes.
+
+from mission_planner import MissionPlanner
+from catastrophe     import Catastrophe
+from vehicle         import Vehicle
+from supply          import Supply
+from graph.graph     import Graph
+from graph.binary    import is_binary
+
+from graph.heurisitics import (
+    heuristic_fn1,
+    heuristic_fn2,
+    heuristic_fn3
+)
+
+from itertools import groupby, chain
+import csv
+
+
+###
+# Utility functions
+###
+
+# Converts a field to an int, or to a float if it isn't an integer
+def parse_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+# Yields the (line_number, kind, fields) records of a scenario file
+def read_records(file):
+    reader = csv.reader(file, skipinitialspace=True)
+    for row in reader:
+        if not row or not row[0] or row[0].startswith("#"):
+            continue
+        yield reader.line_num, row[0], row[1:]
+
+
+# Parses the fields of the records with the given function,
+# raising a ValueError with the line of the invalid records
+def parse_records(records, parse_fn):
+    for line_number, kind, fields in records:
+        try:
+            yield parse_fn(*fields)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid {kind} record at line {line_number}: {e}") from None
+
+
+def parse_node(name, fuel):
+    return (name, parse_number(fuel), None, [], {})
+
+
+def parse_edge(node1, node2, distance, speed_mult, travel_method, access_level):
+    return (node1, node2, parse_number(distance), float(speed_mult), travel_method, int(access_level))
+
+
+def parse_catastrophe(node, time, *supplies_demand):
+    demand = {}
+    for supply in supplies_demand:
+        kind, amount = supply.split("=")
+        demand[kind] = parse_number(amount)
+    return node, Catastrophe(parse_number(time), demand)
+
+
+def parse_vehicle(node, name, category):
+    return node, Vehicle(name, category)
+
+
+def parse_supply(node, kind, amount, perishable_time=None):
+    if perishable_time is not None:
+        perishable_time = parse_number(perishable_time)
+    return node, Supply(kind, parse_number(amount), perishable_time)
+
+
+def parse_destructive_node(node, time):
+    return node, parse_number(time)
+
+
+def parse_destructive_edge(node1, node2, time):
+    return (node1, node2), parse_number(time)
+
+
+# Adds the heuristic values of the selected heuristic to the graph nodes
+def init_heuristic(graph: Graph, catastrophes: dict, fleet: dict, heuristic_option: int) -> None:
+    params = {
+        "graph": graph,
+        "catastrophes": catastrophes,
+        "vehicles": list(chain.from_iterable(fleet.values()))
+    }
+
+    match heuristic_option:
+        case 1:
+            heuristic_fn1(params)
+        case 2:
+            heuristic_fn2(params)
+        case _:
+            heuristic_fn3(params)
+
+
+###
+# Load and save functions
+###
+
+# Loads a scenario file (see the format above) or a binary snapshot and returns
+# the MissionPlanner object (see simulation_data.init_planner for the distance
+# oracle and the heuristic values)
+def load_scenario(path: str) -> MissionPlanner:
+    if is_binary(path):
+        return load_binary_scenario(path)
+
+    with open(path, newline="") as file:
+        return build_scenario(read_records(file))
+
+
+# Builds the MissionPlanner object from an iterable of (line_number, kind, fields)
+# records (e.g. read from a file or generated, see generator.py)
+def build_scenario(records) -> MissionPlanner:
+    graph = Graph(directed=False)
+    catastrophes = {}
+    fleet = {}
+    supplies = {}
+
+    for kind, group in groupby(records, key=lambda record: record[1]):
+        match kind:
+            case "graph":
+                for line_number, _, fields in group:
+                    if graph.nodes or fields not in (["directed"], ["undirected"]):
+                        raise ValueError(f"Invalid graph record at line {line_number}")
+                    graph.directed = fields[0] == "directed"
+            case "node":
+                graph.add_nodes(parse_records(group, parse_node))
+            case "edge":
+                graph.add_edges(parse_records(group, parse_edge))
+            case "catastrophe":
+                catastrophes.update(parse_records(group, parse_catastrophe))
+            case "vehicle":
+                for node, vehicle in parse_records(group, parse_vehicle):
+                    fleet.setdefault(node, []).append(vehicle)
+            case "supply":
+                for node, supply in parse_records(group, parse_supply):
+                    supplies.setdefault(node, {})[supply.kind] = supply
+            case "destructive_node":
+                graph.destructive_nodes.update(parse_records(group, parse_destructive_node))
+            case "destructive_edge":
+                graph.destructive_edges.update(parse_records(group, parse_destructive_edge))
+            case _:
+                line_number, _, _ = next(group)
+                raise ValueError(f"Invalid record kind at line {line_number}: {kind}")
+
+    # Place the catastrophes, vehicles and supplies in their nodes
+    for objects in (catastrophes, fleet, supplies):
+        for node in objects.keys():
+            if graph.get_node(node) is None:
+                raise ValueError(f"Node {node} not in the scenario graph")
+
+    for node in graph.nodes:
+        node.catastrophe = catastrophes.get(node.name, None)
+        node.vehicles = fleet.get(node.name, [])
+        node.supplies = supplies.get(node.name, {})
+
+    return MissionPlanner(graph, catastrophes, fleet, supplies)
+
+
+# Loads a scenario from a binary snapshot saved with Graph.save, reusing the
+# distance tables and the heuristic values if they were saved (see simulation_data.init_planner)
+def load_binary_scenario(path: str) -> MissionPlanner:
+    graph = Graph.load(path)
+
+    catastrophes = {}
+    fleet = {}
+    supplies = {}
+    for node in graph.nodes:
+        if node.catastrophe is not None:
+            catastrophes[node.name] = node.catastrophe
+        if node.vehicles:
+            fleet[node.name] = node.vehicles
+        if node.supplies:
+            supplies[node.name] = node.supplies
+
+    return MissionPlanner(graph, catastrophes, fleet, supplies)
+
+
+# Saves the scenario of a MissionPlanner object to a file
+# (in the format above), keeping the order of the nodes and edges
+def save_scenario(mission_planner: MissionPlanner, path: str) -> None:
+    graph = mission_planner.graph
+
+    # Edges by id, so they are added back in the same order
+    edges = {}
+    for node1, adj_nodes in graph.graph.items():
+        for edge_id, (node2, edge_info) in adj_nodes.items():
+            edges.setdefault(edge_id, (node1.name, node2.name, *edge_info))
+
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+
+        writer.writerow(["graph", "directed" if graph.directed else "undirected"])
+        writer.writerows(["node", node.name, node.fuel] for node in graph.nodes)
+        writer.writerows(["edge", *edges[edge_id]] for edge_id in sorted(edges))
+
+        for node, catastrophe in mission_planner.catastrophes.items():
+            writer.writerow([
+                "catastrophe", node, catastrophe.time,
+                *(f"{kind}={amount}" for kind, amount in catastrophe.supplies_demand.items())
+            ])
+
+        for node, vehicles in mission_planner.fleet.items():
+            writer.writerows(["vehicle", node, vehicle.name, vehicle.category] for vehicle in vehicles)
+
+        for node, node_supplies in mission_planner.supplies.items():
+            for supply in node_supplies.values():
+                perishable_time = [] if supply.perishable_time is None else [supply.perishable_time]
+                writer.writerow(["supply", node, supply.kind, supply.amount, *perishable_time])
+
+        for node, time in graph.destructive_nodes.items():
+            writer.writerow(["destructive_node", node, time])
+
+        for (node1, node2), time in graph.destructive_edges.items():
+            writer.writerow(["destructive_edge", node1, node2, time])
@@ -0,0 +1,131 @@
+# Cache of the results of the search algorithms, reused by the plannings of a
+# mission while the graph is being destroyed.
+# The results are keyed by the search algorithm, the start node, the goals
+# (with their demands) and the vehicle equivalence class (category, tank and
+# cargo, see Vehicle.get_equivalence_class).
+
+# The searches only depend on the time through the slack of each goal, its
+# response time minus the start time: the operation times of the results are
+# relative to the start time (see shuttle.resolve), and only the start
+# operation (added when starting at time 0) depends on the start time, so the
+# results are stored without it and it is added back when they are reused.
+# Each result is stored with the slacks it was searched with and the latest
+# time (relative to the start time) compared before a response time (see
+# best_first.search_goals). Searching with lower slacks, as in the plannings
+# of later times, gives the same results while every slack is after that time,
+# so a vehicle still at its node reuses its results when planning again.
+
+# Each result is also stored with the version of the graph it was computed on
+# and the names of the nodes it depends on (the nodes visited by the search).
+# A result stays valid while the destructions made since its version (see
+# Graph.destroy) don't affect any of its nodes, i.e. don't change their
+# adjacency nor, for the algorithms that use the heuristic values, damage them.
+# The results are checked when looked up, dropping the invalid ones, and the
+# results older than the current version are checked when a new one is stored,
+# so the invalid results are never kept.
+
+from operation import Operation
+
+
+class SearchCache:
+    def __init__(self, graph):
+        self.graph = graph
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+        # Version of the graph the results were last checked on
+        self.version = graph.version
+
+    def __len__(self):
+        return len(self.results)
+
+    # Returns the key of the search of the vehicle from the start node to the
+    # goals (dictionary of response times by catastrophe node)
+    def get_key(self, search_algorithm, start: str, vehicle, goals: dict) -> tuple:
+        goals_key = tuple(
+            (goal, tuple(self.graph.get_node(goal).catastrophe.supplies_demand.items()))
+            for goal in goals.keys()
+            if self.graph.get_node(goal) is not None
+        )
+        return (search_algorithm.__name__, start, goals_key, vehicle.get_equivalence_class())
+
+    # Returns the slack of each goal, its response time minus the start time
+    def get_slacks(self, goals: dict, start_time: int) -> dict:
+        return {goal: response_time - start_time for goal, response_time in goals.items()}
+
+    # Returns if the result is still valid on the current version of the graph
+    def is_valid(self, entry: tuple) -> bool:
+        _, _, version, dependencies, _, _, uses_heuristic = entry
+        for affected_nodes, damaged_nodes in self.graph.destructions[version:]:
+            if (
+                not affected_nodes.isdisjoint(dependencies)
+                or uses_heuristic and (damaged_nodes is None
+                                       or not damaged_nodes.isdisjoint(dependencies))
+            ):
+                return False
+        return True
+
+    # Returns the cached result of the key, (vehicle name, results by goal), for
+    # the goals searched from the start time (None if not cached or no longer valid)
+    def get(self, key: tuple, goals: dict, start_time: int):
+        entry = self.results.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if not self.is_valid(entry):
+            del self.results[key]
+            self.misses += 1
+            return None
+
+        # The results are the same while the slacks are lower and after the latest time
+        vehicle_name, results, _, dependencies, slacks, latest_time, uses_heuristic = entry
+        for goal, slack in self.get_slacks(goals, start_time).items():
+            if goal not in slacks or not latest_time < slack <= slacks[goal]:
+                self.misses += 1
+                return None
+
+        # Valid up to the current version of the graph
+        self.results[key] = (vehicle_name, results, self.graph.version, dependencies,
+                             slacks, latest_time, uses_heuristic)
+        self.hits += 1
+
+        # Add the start operation back (see search algorithms)
+        if start_time != 0:
+            return vehicle_name, results
+        return vehicle_name, {
+            goal: result and (
+                [Operation(0, "start", vehicle=vehicle_name, node=key[1])] + result[0], result[1]
+            )
+            for goal, result in results.items()
+        }
+
+    # Caches the results by goal of the vehicle, for the goals searched from
+    # the start time, depending on the given node names and latest time
+    def put(self, key: tuple, goals: dict, start_time: int, vehicle_name: str, results: dict,
+            dependencies: set, latest_time: int, uses_heuristic: bool) -> None:
+        if self.version != self.graph.version:
+            self.evict()
+
+        # Remove the start operation (see search algorithms)
+        if start_time == 0:
+            results = {
+                goal: result and (result[0][1:], result[1])
+                for goal, result in results.items()
+            }
+
+        self.results[key] = (vehicle_name, results, self.graph.version, dependencies,
+                             self.get_slacks(goals, start_time), latest_time, uses_heuristic)
+
+    # Drops the results no longer valid on the current version of the graph
+    def evict(self) -> None:
+        for key, entry in list(self.results.items()):
+            if self.is_valid(entry):
+                self.results[key] = entry[:2] + (self.graph.version,) + entry[3:]
+            else:
+                del self.results[key]
+        self.version = self.graph.version
+
+    def clear(self) -> None:
+        self.results.clear()
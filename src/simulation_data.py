@@ -3,6 +3,7 @@ from catastrophe     import Catastrophe
 from vehicle         import Vehicle
 # from supply          import Supply
 from graph.graph     import Graph
+from scenario        import load_scenario, init_heuristic
 
 from vehicle import (
     LOW_ACCESS_LEVEL,
@@ -17,8 +18,13 @@ from graph.heurisitics import (
 )
 
 
-def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
+# Returns the MissionPlanner object of a built-in scenario (option 1-3)
+# or of a scenario file given its path (see scenario for the format)
+def init_simulation(option: int | str, heuristic_option: int) -> MissionPlanner:
     match option:
+        case str():
+            mission_planner = load_scenario(option)
+
         case 1:
             # Description: city with 10 nodes
 
@@ -126,27 +132,6 @@ def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
             graph.add_edge("F", "I", 30, 0.80, "air",   HIGH_ACCESS_LEVEL)
             graph.add_edge("I", "J", 35, 0.80, "land",  MEDIUM_ACCESS_LEVEL)
 
-            # Add heuristics values to nodes
-            match heuristic_option:
-                case 1:
-                    heuristic_fn1({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case 2:
-                    heuristic_fn2({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case _:
-                    heuristic_fn3({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-
             # Create destructive nodes conditions
             destructive_nodes = {
                 "C": 300,
@@ -162,8 +147,8 @@ def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
             }
             graph.destructive_edges = destructive_edges
 
-            # Return the MissionPlanner object
-            return MissionPlanner(graph, catastrophes, fleet, supplies)
+            # Create the MissionPlanner object
+            mission_planner = MissionPlanner(graph, catastrophes, fleet, supplies)
 
         case 2:
             # Description: Azores archipelago with 9 islands
@@ -291,27 +276,6 @@ def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
             graph.add_edge("Sao Miguel",  "Faial",        180, 0.85, "water", MEDIUM_ACCESS_LEVEL)
             graph.add_edge("Sao Miguel",  "Faial",        180, 0.70, "air",   LOW_ACCESS_LEVEL)
 
-            # Add heuristics values to nodes
-            match heuristic_option:
-                case 1:
-                    heuristic_fn1({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case 2:
-                    heuristic_fn2({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case _:
-                    heuristic_fn3({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-
             # Create destructive nodes conditions
             destructive_nodes = {
                 "Santa Maria": 400,
@@ -325,8 +289,8 @@ def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
             }
             graph.destructive_edges = destructive_edges
 
-            # Return the MissionPlanner object
-            return MissionPlanner(graph, catastrophes, fleet, supplies)
+            # Create the MissionPlanner object
+            mission_planner = MissionPlanner(graph, catastrophes, fleet, supplies)
 
         case 3:
             # Description: Test simulation with 15 nodes
@@ -458,35 +422,36 @@ def init_simulation(option: int, heuristic_option: int) -> MissionPlanner:
             graph.add_edge("M", "O",  5, 1.00, "land", MEDIUM_ACCESS_LEVEL)  # Low-cost alternate path
             # graph.add_edge("M", "O",  5, 1.00, "air",  MEDIUM_ACCESS_LEVEL)
 
-            # Add heuristics values to nodes
-            match heuristic_option:
-                case 1:
-                    heuristic_fn1({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case 2:
-                    heuristic_fn2({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-                case _:
-                    heuristic_fn3({
-                        "graph": graph,
-                        "catastrophes": catastrophes,
-                        "vehicles": sum(fleet.values(), [])
-                    })
-
             # No destructive nodes
             graph.destructive_nodes = {}
 
             # No destructive edges
             graph.destructive_edges = {}
 
-            # return the MissionPlanner object
-            return MissionPlanner(graph, catastrophes, fleet, supplies)
+            # Create the MissionPlanner object
+            mission_planner = MissionPlanner(graph, catastrophes, fleet, supplies)
 
         case _:
             raise ValueError("Invalid option")
+
+    return init_planner(mission_planner, heuristic_option)
+
+
+# Prepares the MissionPlanner object of a scenario for the searches and
+# returns it, with the heuristic values of the selected heuristic
+def init_planner(mission_planner: MissionPlanner, heuristic_option: int) -> MissionPlanner:
+    graph = mission_planner.graph
+
+    # Answer the distance queries from cached tables,
+    # repaired instead of rebuilt when nodes or edges are destroyed
+    # (binary snapshots can be saved with the tables)
+    if graph.oracle is None:
+        graph.use_distance_oracle()
+
+    # Add the heuristic values to the nodes, unless the snapshot was saved
+    # with the values of the same heuristic
+    heuristic_fn = {1: heuristic_fn1, 2: heuristic_fn2}.get(heuristic_option, heuristic_fn3)
+    if graph.heuristic is None or graph.heuristic[0] is not heuristic_fn:
+        init_heuristic(graph, mission_planner.catastrophes, mission_planner.fleet, heuristic_option)
+
+    return mission_planner
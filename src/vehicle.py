@@ -164,6 +164,19 @@ class Vehicle:
         # round up the result to 2 decimal places
         return ceil(additional_fuel_needed * 100) / 100
 
+    # Vehicles with the same equivalence class (at the same node) find the same
+    # plans, apart from the name of the vehicle in the operations
+    def get_equivalence_class(self) -> (str, float, tuple):
+        cargo = tuple(
+            (supply.kind, supply.amount, supply.perishable_time)
+            for supply in self.cargo_contents.values()
+        )
+        return (self.category, self.tank, cargo)
+
+    # Vehicles with the same capability class can travel through the same edges
+    def get_capability_class(self) -> (str, int):
+        return (self.travel_method, self.access_level)
+
     def is_travel_possible(self, travel_method: str, access_level: int) -> bool:
         return (
             self.travel_method == travel_method
@@ -291,3 +304,57 @@ class Vehicle:
         }
 
         return supplies_loaded, supplies_left
+
+
+###
+# Vehicle search state
+###
+
+# Fuel state of a vehicle used by the search algorithms while exploring the
+# graph, instead of copying the whole Vehicle object for each edge.
+# The states are immutable (the fuel methods return new states), so they can
+# be shared by the search states, and hold:
+# - vehicle : Vehicle (the vehicle the state was derived from, for its specs)
+# - tank    : float   (l) (current fuel level)
+# The cargo doesn't change while exploring, so it stays in the vehicle.
+class VehicleState:
+    __slots__ = ("vehicle", "tank")
+
+    def __init__(self, vehicle: Vehicle, tank: float):
+        self.vehicle = vehicle
+        self.tank    = tank
+
+    @classmethod
+    def from_vehicle(cls, vehicle: Vehicle) -> 'VehicleState':
+        return cls(vehicle, vehicle.tank)
+
+    # Same as Vehicle.calculate_fuel_needed
+    def calculate_fuel_needed(self, distance: int) -> float:
+        fuel_needed = distance * self.vehicle.fuel_consumption / 100
+        additional_fuel_needed = max(0, fuel_needed - self.tank)
+        # round up the result to 2 decimal places
+        return ceil(additional_fuel_needed * 100) / 100
+
+    def has_enough_fuel(self, distance: int) -> bool:
+        return self.tank >= self.calculate_fuel_needed(distance)
+
+    # Returns a tuple with:
+    # - the state after refueling
+    # - the time, in minutes, it took to refuel
+    def refuel(self, liters: float) -> ('VehicleState', int):
+        tank = min(self.tank + liters, self.vehicle.tank_capacity)
+        return VehicleState(self.vehicle, tank), ceil(liters * REFUEL_TIME)
+
+    # Returns a tuple with:
+    # - the state after traveling
+    # - the time in minutes
+    # - the fuel consumed
+    def travel(self, distance: int) -> ('VehicleState', float, float):
+        fuel_consumed = distance * self.vehicle.fuel_consumption / 100
+        # round the fuel consumed to 2 decimal places
+        fuel_consumed = ceil(fuel_consumed * 100) / 100
+        return (
+            VehicleState(self.vehicle, self.tank - fuel_consumed),
+            (distance / self.vehicle.speed) * 60,  # time in minutes
+            fuel_consumed
+        )